@@ -0,0 +1,96 @@
+import pygame
+from pygame import mixer
+
+# -------------------------------
+# Shared asset cache
+# -------------------------------
+# Everything is loaded from disk once per process and shared by Block,
+# Tower and the screens, so restarting a game does no disk I/O.
+
+IMAGES = {
+    "block": "assets/block.png",
+    "blockgold": "assets/blockgold.png",
+    "background0": "assets/background0.jpg",
+    "background1": "assets/background1.jpg",
+    "background2": "assets/background2.jpg",
+    "background3": "assets/background3.jpg",
+}
+
+# images with transparency, converted with convert_alpha()
+ALPHA_IMAGES = ("block", "blockgold")
+
+# Rotated sprites are cached per image at this angle step (degrees), so
+# there are at most 360 / ROTATION_STEP of them for each image
+ROTATION_STEP = 1
+
+SOUNDS = {
+    "build": "assets/build.wav",
+    "gold": "assets/gold.wav",
+    "over": "assets/overmusic.wav",
+    "fall": "assets/fall.wav",
+}
+
+FONTS = {
+    "over": ("freesansbold.ttf", 64),
+    "mini": ("freesansbold.ttf", 16),
+    "score": ("freesansbold.ttf", 32),
+}
+
+
+class Assets:
+    def __init__(self):
+        self.images = {}
+        self.sounds = {}
+        self.fonts = {}
+        self.rotations = {}  # (name, step) -> (surface, offset)
+        self.loaded = False
+
+    def load(self, convert=True):
+        """Load every asset once. Call after pygame.display.set_mode() so
+        surfaces can be converted to the display pixel format (convert=False
+        for the renderer backend, which has no display surface)."""
+        if self.loaded:
+            return self
+        for name, path in IMAGES.items():
+            image = pygame.image.load(path)
+            if convert:
+                image = image.convert_alpha() if name in ALPHA_IMAGES else image.convert()
+            self.images[name] = image
+        if mixer.get_init():
+            for name, path in SOUNDS.items():
+                self.sounds[name] = mixer.Sound(path)
+        for name, (path, size) in FONTS.items():
+            self.fonts[name] = pygame.font.Font(path, size)
+        self.loaded = True
+        return self
+
+    def image(self, name):
+        return self.images[name]
+
+    def sound(self, name):
+        return self.sounds[name]
+
+    def font(self, name):
+        return self.fonts[name]
+
+    def rotated(self, name, angle):
+        """Image `name` turned by `angle` degrees, as (surface, offset).
+
+        The angle is rounded to ROTATION_STEP and the surface made on first
+        use. Blit at the unrotated position + offset to turn about the center.
+        """
+        step = round(angle / ROTATION_STEP) % (360 // ROTATION_STEP)
+        cached = self.rotations.get((name, step))
+        if cached is None:
+            image = self.images[name]
+            surface = pygame.transform.rotate(image, step * ROTATION_STEP)
+            offset = ((image.get_width() - surface.get_width()) / 2,
+                      (image.get_height() - surface.get_height()) / 2)
+            cached = self.rotations[(name, step)] = (surface, offset)
+        return cached
+
+    def prerender_rotations(self, names=ALPHA_IMAGES):
+        """Fill the rotation cache up front instead of on first use"""
+        for name in names:
+            for step in range(360 // ROTATION_STEP):
+                self.rotated(name, step * ROTATION_STEP)
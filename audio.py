@@ -0,0 +1,72 @@
+import time
+
+from pygame import mixer
+
+# -------------------------------
+# Sound effects
+# -------------------------------
+# The mixer is set up with a small buffer *before* pygame.init() (pre_init
+# does nothing afterwards), and each category of effect plays on its own
+# reserved channels, so a long game-over sound can never take the channel
+# a build click needs.
+
+# category: (sound names, reserved channels)
+CATEGORIES = {
+    "build": (("build", "gold"), 2),
+    "fall": (("fall",), 1),
+    "over": (("over",), 1),
+}
+
+def pre_init(frequency=44100, buffer=512):
+    """Call before pygame.init(). buffer is samples per channel, every
+    sound waits up to one buffer to be heard (512 at 44.1 kHz is ~12 ms)"""
+    mixer.pre_init(frequency, -16, 2, buffer)
+
+class AudioEngine:
+    """Plays the preloaded sounds from Assets on reserved channels.
+
+    play() returns the trigger-to-output latency estimate: the time spent
+    starting the sound plus one mixer buffer, the wait before SDL hands
+    the next mixed block to the device.
+    """
+    def __init__(self, assets, buffer=512):
+        self.sounds = assets.sounds  # loaded once by Assets.load()
+        self.channels = {}  # category -> [Channel]
+        self.categories = {}  # sound name -> category
+        self.next = {}  # category -> channel to steal when all are busy
+        self.buffer_latency = 0.0
+        self.enabled = bool(mixer.get_init())
+        if not self.enabled:
+            return
+
+        frequency = mixer.get_init()[0]
+        self.buffer_latency = buffer / frequency
+        reserved = sum(count for _, count in CATEGORIES.values())
+        if mixer.get_num_channels() < reserved:
+            mixer.set_num_channels(reserved)
+        mixer.set_reserved(reserved)  # find_channel() won't hand these out
+        index = 0
+        for category, (names, count) in CATEGORIES.items():
+            self.channels[category] = [mixer.Channel(index + i) for i in range(count)]
+            self.next[category] = 0
+            index += count
+            for name in names:
+                self.categories[name] = category
+
+    def channel(self, category):
+        """A free channel of the category, else the one used longest ago"""
+        channels = self.channels[category]
+        for channel in channels:
+            if not channel.get_busy():
+                return channel
+        i = self.next[category]
+        self.next[category] = (i + 1) % len(channels)
+        return channels[i]
+
+    def play(self, name):
+        """Play a sound, return estimated seconds until it is audible"""
+        if not self.enabled:
+            return None
+        start = time.perf_counter()
+        self.channel(self.categories[name]).play(self.sounds[name])
+        return time.perf_counter() - start + self.buffer_latency
@@ -0,0 +1,109 @@
+"""Compare blink detection backends on the same recorded clip.
+
+    python -m benchmarks.detectors clip.mp4 --labels clip.txt
+
+The clip can be any frame source spec (see sources.py), e.g. a video
+file, images:frames/ or synthetic:300. The labels file lists the frame
+index of every real blink, one per line (frames where the eyes reopen).
+Each backend is reported with frames/sec and blink precision/recall; a
+detection within --tolerance frames of an unmatched label counts as a
+hit. dlib is run both with the face tracker (dlib) and with HOG
+detection on every frame (dlib-notrack).
+"""
+import argparse
+import time
+
+import cv2
+
+from detection import BACKENDS, create_detector
+from sources import create_source
+
+
+def load_frames(spec, limit=None):
+    """Decode the whole clip up front so decoding isn't part of the timing"""
+    source = create_source(spec, pacing="fast")
+    frames = []
+    while source.isOpened() and (limit is None or len(frames) < limit):
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    source.release()
+    return frames
+
+
+def load_labels(path):
+    with open(path) as f:
+        return [int(line.split("#")[0]) for line in f if line.split("#")[0].strip()]
+
+
+def match_blinks(detected, labels, tolerance):
+    """Return (true positives, precision, recall)"""
+    unmatched = sorted(labels)
+    hits = 0
+    for frame in detected:
+        near = [label for label in unmatched if abs(label - frame) <= tolerance]
+        if near:
+            unmatched.remove(min(near, key=lambda label: abs(label - frame)))
+            hits += 1
+    precision = hits / len(detected) if detected else 0.0
+    recall = hits / len(labels) if labels else 0.0
+    return hits, precision, recall
+
+
+def variants(backends, detect_scale):
+    """(row label, backend, create_detector kwargs) for every row"""
+    rows = []
+    for name in backends:
+        if name == "dlib":
+            rows.append(("dlib", name, {"tracking": True, "detect_scale": detect_scale}))
+            rows.append(("dlib-notrack", name, {"tracking": False}))
+        else:
+            rows.append((name, name, {}))
+    return rows
+
+
+def run_backend(name, frames, **options):
+    detector = create_detector(name, **options)
+    blinks = []
+    start = time.perf_counter()
+    for index, gray in enumerate(frames):
+        if detector.detect_blink(gray):
+            blinks.append(index)
+    elapsed = time.perf_counter() - start
+    return blinks, len(frames) / elapsed if elapsed else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("clip", help="recorded video (or frame source spec) to run every backend on")
+    parser.add_argument("--labels", help="file with ground truth blink frame indices")
+    parser.add_argument("--backends", nargs="+", default=sorted(BACKENDS), choices=sorted(BACKENDS))
+    parser.add_argument("--tolerance", type=int, default=5, help="max frame offset for a hit")
+    parser.add_argument("--frames", type=int, help="only use the first N frames")
+    parser.add_argument("--detect-scale", type=float, default=1.0,
+                        help="HOG detection scale for tracked dlib (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.clip, args.frames)
+    if not frames:
+        parser.error(f"could not read any frames from {args.clip}")
+    labels = load_labels(args.labels) if args.labels else None
+
+    print(f"{len(frames)} frames" + (f", {len(labels)} labelled blinks" if labels is not None else ""))
+    print(f"{'backend':<14}{'fps':>10}{'blinks':>8}{'precision':>11}{'recall':>8}")
+    for label, name, options in variants(args.backends, args.detect_scale):
+        try:
+            blinks, fps = run_backend(name, frames, **options)
+        except RuntimeError as e:
+            print(f"{label:<14}  skipped: {e}")
+            continue
+        row = f"{label:<14}{fps:>10.1f}{len(blinks):>8}"
+        if labels is not None:
+            _, precision, recall = match_blinks(blinks, labels, args.tolerance)
+            row += f"{precision:>11.2f}{recall:>8.2f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
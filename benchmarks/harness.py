@@ -0,0 +1,78 @@
+import json
+import platform
+import time
+import tracemalloc
+
+# -------------------------------
+# Tiny benchmark harness
+# -------------------------------
+
+def measure(fn, number=100, repeat=5):
+    """Time fn() and count Python heap allocations.
+
+    Returns per-call timings in microseconds (best/mean/worst of `repeat`
+    rounds of `number` calls). Allocations come from tracemalloc on one
+    extra round: peak bytes and the net number of memory blocks per call.
+    SDL/OpenCV allocations in C are not visible to tracemalloc.
+    """
+    fn()  # warm up caches before timing
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number * 1e6)
+
+    tracemalloc.start()
+    before_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.reset_peak()
+    for _ in range(number):
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    after_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+
+    return {
+        "best_us": min(rounds),
+        "mean_us": sum(rounds) / len(rounds),
+        "worst_us": max(rounds),
+        "calls": number * repeat,
+        "alloc_peak_bytes": peak,
+        "alloc_blocks_per_call": (after_blocks - before_blocks) / number,
+    }
+
+def save(results, path):
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+def compare(results, baseline, threshold=1.2):
+    """Return [(name, baseline_us, now_us, ratio)] for benchmarks that got
+    slower than threshold x their baseline best time"""
+    regressions = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if not base or not base["best_us"]:
+            continue
+        ratio = row["best_us"] / base["best_us"]
+        if ratio > threshold:
+            regressions.append((name, base["best_us"], row["best_us"], ratio))
+    return regressions
+
+def report(results, baseline=None):
+    print(f"{'benchmark':<40}{'best us':>12}{'mean us':>12}{'peak KiB':>10}{'blocks':>9}{'vs base':>9}")
+    for name, row in results.items():
+        line = (f"{name:<40}{row['best_us']:>12.1f}{row['mean_us']:>12.1f}"
+                f"{row['alloc_peak_bytes'] / 1024:>10.1f}{row['alloc_blocks_per_call']:>9.1f}")
+        if baseline and name in baseline and baseline[name]["best_us"]:
+            line += f"{row['best_us'] / baseline[name]['best_us']:>8.2f}x"
+        print(line)
@@ -0,0 +1,265 @@
+"""Microbenchmarks for the render, camera and detection hot paths.
+
+    python -m benchmarks.hotpaths --output results.json
+    python -m benchmarks.hotpaths --baseline results.json   # fail on regressions
+
+Runs under the SDL dummy video driver, so no window or camera is needed.
+"""
+import argparse
+import os
+import random
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import cv2
+import numpy as np
+import pygame
+
+from assets import Assets
+from camera import FramePipeline, FRAME_SIZE
+from detection import BACKENDS, create_detector
+from game import Game
+from hud import Hud
+from render import TextureView
+from sprites import Block, Tower
+from benchmarks import harness
+from benchmarks.detectors import load_frames
+
+
+def setup():
+    pygame.init()
+    screen = pygame.display.set_mode(FRAME_SIZE)
+    return screen, Assets().load()
+
+
+def build_tower(assets, size, rng):
+    """Tower of `size` blocks, window reset the same way the game does it"""
+    tower = Tower(assets)
+    for _ in range(size):
+        tower.build(370 + rng.randint(-30, 30))
+        if tower.size >= 5:
+            tower.reset()
+    return tower
+
+
+def build_endless_tower(assets, size, rng):
+    """Endless-mode tower of `size` blocks, viewport scrolled to its top"""
+    tower = Tower(assets, endless=True)
+    for _ in range(size):
+        tower.build(370 + rng.randint(-5, 5))
+    tower.viewport.bottom = max(0, size * 64 - 155)
+    tower.y = tower.viewport.to_screen(size * 64)
+    return tower
+
+
+def tower_cases(screen, assets, sizes):
+    rng = random.Random(0)
+    cases = {}
+    for size in sizes:
+        tower = build_tower(assets, size, rng)
+        cases[f"tower.display[{size}]"] = lambda t=tower: t.display(screen)
+
+        def rebuild(t=tower):
+            t.cached_image = None  # force a full redraw of the cached surface
+            t.display(screen)
+        cases[f"tower.display.rebuild[{size}]"] = rebuild
+    return cases
+
+
+def endless_cases(screen, assets, sizes):
+    rng = random.Random(0)
+    cases = {}
+    for size in sizes:
+        tower = build_endless_tower(assets, size, rng)
+
+        top = tower.viewport.bottom
+
+        def scroll(t=tower, top=top, step=[0]):
+            # cycle through the last two block heights of scrolling, the
+            # culled window shifts every 64 px
+            step[0] = (step[0] + 1) % 128
+            t.viewport.bottom = top - step[0]
+            t.y = t.viewport.to_screen(t.size * 64)
+            t.display(screen)
+        cases[f"endless.display.scroll[{size}]"] = scroll
+    return cases
+
+
+def block_cases(screen, assets):
+    tower = Tower(assets)
+    swinging = Block(assets)
+    falling = Block(assets)
+    falling.rotation = 0
+
+    def fall():
+        falling.rotation = (falling.rotation + 1) % 360
+        falling.display(screen, tower)
+
+    return {"block.display.swinging": lambda: swinging.display(screen, tower),
+            "block.display.falling": fall}
+
+
+def frame_cases(screen, frame):
+    def legacy():
+        # The original main-loop chain
+        f = cv2.flip(frame, 1)
+        f = cv2.cvtColor(f, cv2.COLOR_BGR2RGB)
+        f = np.rot90(f)
+        surface = pygame.surfarray.make_surface(f)
+        surface = pygame.transform.scale(surface, FRAME_SIZE)
+        screen.blit(surface, (0, 0))
+
+    pipeline = FramePipeline(FRAME_SIZE)
+
+    def camera_side():
+        pipeline.process(frame)
+
+    buffer = pipeline.process(frame)
+
+    def main_side():
+        screen.blit(pipeline.to_surface(buffer), (0, 0))
+
+    return {"frame.legacy_chain": legacy,
+            "frame.pipeline.camera_side": camera_side,
+            "frame.pipeline.main_side": main_side}
+
+
+def detector_cases(frames):
+    cases = {}
+    for name in sorted(BACKENDS):
+        try:
+            detector = create_detector(name)
+        except (RuntimeError, cv2.error) as e:
+            print(f"skipping detector {name}: {e}", file=sys.stderr)
+            continue
+        def detect(d=detector, index=[0]):
+            d.detect_blink(frames[index[0] % len(frames)])
+            index[0] += 1
+        cases[f"detect_blink.{name}"] = detect
+    return cases
+
+
+def hud_cases(screen, assets):
+    score_font = assets.font("score")
+    mini_font = assets.font("mini")
+    hud = Hud()
+    score = [0]
+
+    def uncached():
+        screen.blit(score_font.render("Score: 0", True, (0, 0, 0)), (10, 10))
+        screen.blit(mini_font.render("Blink Control (Press 'B' to clear blinks)", True,
+                                     (255, 255, 255)), (10, 550))
+
+    def steady():
+        hud.text("score", "Score: 0", score_font, (0, 0, 0), (10, 10))
+        hud.text("mode", "Blink Control (Press 'B' to clear blinks)", mini_font,
+                 (255, 255, 255), (10, 550))
+        hud.draw(screen)
+
+    def scoring():
+        score[0] += 1  # new text every call, past the cache limit
+        hud.text("score", "Score: " + str(score[0]), score_font, (0, 0, 0), (10, 10))
+        hud.draw(screen)
+
+    return {"hud.uncached": uncached, "hud.steady": steady, "hud.score_change": scoring}
+
+
+def renderer_cases(assets, frame):
+    """A main-loop frame through the texture view, camera scaled to 1080p"""
+    try:
+        view = TextureView((800, 600))
+    except (RuntimeError, pygame.error) as e:
+        print(f"skipping renderer: {e}", file=sys.stderr)
+        return {}
+    view.window.size = (1920, 1080)
+    pipeline = FramePipeline(FRAME_SIZE)
+    buffer = pipeline.process(frame)
+    tower = build_tower(assets, 4, random.Random(0))
+    block = Block(assets)
+
+    def frame_step():
+        view.camera(pipeline.to_surface(buffer))  # a new frame every call
+        tower.render(view)
+        block.render(view, tower)
+        view.present()
+
+    return {"renderer.frame": frame_step}
+
+
+def main_loop_case(screen, assets, frame):
+    """One main-loop frame: camera blit, HUD, a game tick, sprites, flip"""
+    pipeline = FramePipeline(FRAME_SIZE)
+    camera_surface = pipeline.to_surface(pipeline.process(frame))
+    game = Game(make_block=lambda: Block(assets), make_tower=lambda: Tower(assets), seed=0)
+    score_font = assets.font("score")
+    mini_font = assets.font("mini")
+    hud = Hud()
+    tick = [0]
+
+    def frame_step():
+        screen.blit(camera_surface, (0, 0))
+        hud.text("score", "Score: " + str(game.score), score_font, (0, 0, 0), (10, 10))
+        hud.text("mode", "Blink Control (Press 'B' to clear blinks)", mini_font,
+                 (255, 255, 255), (10, 550))
+        hud.draw(screen)
+        tick[0] += 1
+        game.step(drop=tick[0] % 90 == 0)
+        if game.over:
+            game.reset()
+        if game.tower.get_display():
+            game.tower.display(screen)
+        game.block.display(screen, game.tower)
+        pygame.display.update()
+
+    return {"main_loop.frame": frame_step}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="fail when best time exceeds baseline by this factor")
+    parser.add_argument("--clip", default="synthetic:30",
+                        help="frame source spec for detector frames (default: %(default)s)")
+    parser.add_argument("--number", type=int, default=50, help="calls per timing round")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this")
+    args = parser.parse_args(argv)
+
+    screen, assets = setup()
+    gray_frames = load_frames(args.clip, 60)
+    color_frame = cv2.cvtColor(gray_frames[0], cv2.COLOR_GRAY2BGR)
+
+    cases = {}
+    cases.update(tower_cases(screen, assets, (1, 10, 100, 1000)))
+    cases.update(endless_cases(screen, assets, (10, 1000, 100000)))
+    cases.update(block_cases(screen, assets))
+    cases.update(frame_cases(screen, color_frame))
+    cases.update(detector_cases(gray_frames))
+    cases.update(hud_cases(screen, assets))
+    cases.update(main_loop_case(screen, assets, color_frame))
+    cases.update(renderer_cases(assets, color_frame))
+
+    results = {}
+    for name, fn in cases.items():
+        if args.only and args.only not in name:
+            continue
+        number = max(1, args.number // 10) if name.startswith("detect_blink") else args.number
+        results[name] = harness.measure(fn, number=number)
+
+    baseline = harness.load(args.baseline) if args.baseline else None
+    harness.report(results, baseline)
+    if args.output:
+        harness.save(results, args.output)
+    if baseline:
+        regressions = harness.compare(results, baseline, args.threshold)
+        for name, before, now, ratio in regressions:
+            print(f"REGRESSION {name}: {before:.1f} -> {now:.1f} us ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+import cv2
+import numpy as np
+import pygame
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import threading
+import queue
+import time
+
+from detection import create_detector
+from sources import CLOCKS, create_source
+from channels import BlinkEvent, BlinkChannel, FrameMailbox, QueueBlinkChannel
+
+# -------------------------------
+# Camera setup
+# -------------------------------
+
+FRAME_SIZE = (800, 600)
+
+def open_source(source, pacing="realtime", low_latency=False):
+    """Accept a frame source object or a spec string for create_source()"""
+    if isinstance(source, str):
+        return create_source(source, pacing, low_latency=low_latency)
+    return source
+
+def frame_surface(buffer, size):
+    """Wrap a BGRA frame buffer in an opaque surface without copying it.
+
+    frombuffer() gives "BGRA" per-pixel alpha; camera frames are opaque, so
+    alpha is switched off and the blit becomes a plain copy in the display's
+    own XRGB layout instead of a full-frame alpha blend.
+    """
+    surface = pygame.image.frombuffer(buffer, size, "BGRA")
+    surface.set_alpha(None)
+    return surface
+
+class FramePipeline:
+    """Turn raw BGR camera frames into display-ready pixels.
+
+    Scaling to the window size and the conversion to 32-bit BGRA all
+    happen on the camera thread into preallocated buffers. The main
+    thread only wraps a buffer with pygame.image.frombuffer (no copy) and
+    blits it once.
+    """
+    def __init__(self, size=FRAME_SIZE, buffers=4):
+        width, height = size
+        self.size = size
+        self.scaled = np.empty((height, width, 3), np.uint8)
+        # Ring of output buffers so the frame being displayed is never overwritten
+        self.buffers = [np.empty((height, width, 4), np.uint8) for _ in range(buffers)]
+        self.index = 0
+
+    def process(self, frame, out=None):
+        if out is None:
+            out = self.buffers[self.index]
+            self.index = (self.index + 1) % len(self.buffers)
+        cv2.resize(frame, self.size, dst=self.scaled, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(self.scaled, cv2.COLOR_BGR2BGRA, dst=out)
+        return out
+
+    def to_surface(self, buffer):
+        """Wrap a processed buffer in a surface without copying it"""
+        return frame_surface(buffer, self.size)
+
+class DetectionScheduler:
+    """Decides which captured frames go through blink detection.
+
+    Capture runs at whatever rate the source delivers and every frame still
+    goes to the display; detection runs on the frame just read at up to
+    `rate` Hz. Once a second the measured detection cost is checked
+    against `budget` (fraction of one CPU core): over budget the rate is
+    lowered to fit, and at min_rate the backend's face detection step runs
+    on a smaller frame (landmarks and eyes stay at full resolution), as
+    far as the backend can still shrink it.
+    Well under budget it steps back up, resolution first. Going back to a
+    scale that was just too expensive waits longer each time (up to
+    MAX_BACKOFF seconds), since a smaller scale can look cheap only
+    because it stopped finding faces.
+    """
+    SCALES = (1.0, 0.75, 0.5)
+    MAX_BACKOFF = 64.0
+
+    def __init__(self, rate=30, budget=0.5, min_rate=15):
+        self.target = rate
+        self.min_rate = min(min_rate, rate)
+        self.budget = budget
+        self.rate = rate
+        self.scale_index = 0
+        self.cost = 0.0  # smoothed seconds per detection
+        self.credit = 1.0  # detections owed, capped so a stall doesn't cause a burst
+        self.last_time = None
+        self.adapt_time = time.perf_counter()
+        self.backoff = 1.0  # seconds to hold a lowered scale
+        self.raised = None  # when the scale last went up
+        self.lowered = None  # when the scale last went down
+
+    @property
+    def scale(self):
+        return self.SCALES[self.scale_index]
+
+    def due(self, now):
+        """Called once per captured frame: should this one be detected?"""
+        if self.last_time is not None:
+            self.credit = min(2.0, self.credit + (now - self.last_time) * self.rate)
+        self.last_time = now
+        if self.credit < 1.0:
+            return False
+        self.credit -= 1.0
+        return True
+
+    def detect(self, detector, gray):
+        """Run detector on gray at the current face detection scale, timing it"""
+        start = time.perf_counter()
+        blink = detector.detect_blink(gray, self.scale)
+        end = time.perf_counter()
+        self.cost = 0.8 * self.cost + 0.2 * (end - start) if self.cost else end - start
+        if end - self.adapt_time >= 1.0:
+            self.adapt_time = end
+            self.adapt(end, detector.lowest_face_scale())
+        return blink
+
+    def adapt(self, now, lowest_scale=0.0):
+        """Fit rate and scale to the budget, return True if the scale changed.
+
+        Scales below lowest_scale would change nothing in the backend, so
+        they are never stepped to or reported.
+        """
+        load = self.cost * self.rate
+        if load > self.budget:
+            if self.rate > self.min_rate:
+                self.rate = max(self.min_rate, 0.9 * self.budget / self.cost)
+                return False
+            if (self.scale_index < len(self.SCALES) - 1
+                    and self.SCALES[self.scale_index + 1] >= lowest_scale - 1e-9):
+                # too expensive again soon after stepping up: hold it down longer
+                if self.raised is not None and now - self.raised < 2 * self.backoff + 1.0:
+                    self.backoff = min(self.MAX_BACKOFF, self.backoff * 2)
+                else:
+                    self.backoff = 1.0
+                self.scale_index += 1
+                self.lowered = now
+                self.cost = 0.0
+                return True
+        elif load < 0.5 * self.budget:
+            if self.scale_index > 0:
+                if now - self.lowered < self.backoff:
+                    return False
+                self.scale_index -= 1
+                self.raised = now
+                self.cost = 0.0
+                return True
+            self.rate = min(self.target, self.rate * 1.25)
+        return False
+
+def capture_time(source, age):
+    """(capture timestamp, smoothed capture age) for the frame just read.
+
+    Sources report when the frame was captured (see sources.CLOCKS); fall
+    back to now for ones that don't.
+    """
+    now = time.monotonic()
+    captured = getattr(source, "captured", None) or now
+    return captured, 0.9 * age + 0.1 * (now - captured)
+
+class CameraThread(threading.Thread):
+    def __init__(self, backend="dlib", source="camera:0", pacing="realtime",
+                 detect_rate=30, detect_budget=0.5, low_latency=True):
+        super().__init__()
+        self.frames = FrameMailbox()  # Latest display frame only
+        self.blinks = BlinkChannel()  # Timestamped blink events
+        self.last_seq = -1
+        self.captures = 0  # frames read, for the profiler overlay
+        self.detections = 0  # frames run through the blink detector
+        self.capture_age = 0.0  # smoothed seconds from capture to read() returning
+        self.capture_clock = "grab"  # where capture times come from, see sources.CLOCKS
+        self.camera = open_source(source, pacing, low_latency)  # any frame source (see sources.py)
+        self.blink_detector = create_detector(backend)
+        self.scheduler = DetectionScheduler(detect_rate, detect_budget)
+        self.pipeline = FramePipeline(FRAME_SIZE)
+        self.running = True
+        self.daemon = True  # Dies when main thread dies
+
+    def run(self):
+        """Main camera processing loop running in separate thread"""
+        while self.running and self.camera.isOpened():
+            # read() blocks until the source has a frame, that paces the loop
+            ret, frame = self.camera.read()
+            if not ret:
+                time.sleep(0.01)  # don't spin on a camera that isn't delivering
+                continue
+            captured, self.capture_age = capture_time(self.camera, self.capture_age)
+            self.capture_clock = getattr(self.camera, "clock", "grab")
+            self.captures += 1
+
+            # Process blink detection
+            if self.scheduler.due(captured):
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                self.detections += 1
+                if self.scheduler.detect(self.blink_detector, gray):
+                    self.blinks.push(BlinkEvent(captured, time.monotonic()))
+
+            self.publish(frame)
+
+    def publish(self, frame):
+        """Mirror, scale and convert a captured frame for pygame display"""
+        self.frames.put(self.pipeline.process(frame))
+
+    def latest_frame(self):
+        """Return the newest display buffer, or None if it was already taken"""
+        seq, frame = self.frames.get()
+        if seq == self.last_seq:
+            return None
+        self.last_seq = seq
+        return frame
+
+    def to_surface(self, buffer):
+        return self.pipeline.to_surface(buffer)
+
+    def counters(self):
+        """(frames captured, frames detected) since start"""
+        return self.captures, self.detections
+
+    def schedule(self):
+        """(detection rate, detection scale) the scheduler settled on"""
+        return self.scheduler.rate, self.scheduler.scale
+
+    def age(self):
+        """Smoothed age of frames when they come out of the source"""
+        return self.capture_age
+
+    def age_clock(self):
+        """What age() is measured from, one of sources.CLOCKS"""
+        return self.capture_clock
+
+    def stop(self):
+        """Stop the camera thread"""
+        self.running = False
+        if self.camera.isOpened():
+            self.camera.release()
+
+# -------------------------------
+# Process-based camera
+# -------------------------------
+
+class FrameRing:
+    """Ring of display frames in shared memory.
+
+    Layout: an int64 header holding the sequence number of the newest
+    complete frame (-1 = none yet) and the capture/detection counters,
+    four float64 for the detection rate and scale, the capture age and its
+    clock (index into sources.CLOCKS), followed by `slots` BGRA frames. The
+    writer fills slot seq % slots and only then publishes seq, so readers
+    get numpy views straight into shared memory with no pickling or copies.
+    """
+    HEADER = 56
+
+    def __init__(self, size=FRAME_SIZE, slots=4, name=None):
+        width, height = size
+        self.size = size
+        self.slots = slots
+        self.shape = (height, width, 4)
+        frame_bytes = width * height * 4
+        create = name is None
+        if create:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.HEADER + frame_bytes * slots)
+        else:
+            # The creating process owns the segment and unlinks it
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        self.header = np.ndarray((3,), np.int64, self.shm.buf, 0)
+        self.schedule = np.ndarray((4,), np.float64, self.shm.buf, 24)
+        self.frames = [np.ndarray(self.shape, np.uint8, self.shm.buf, self.HEADER + i * frame_bytes)
+                       for i in range(slots)]
+        if create:
+            self.header[:] = (-1, 0, 0)
+            self.schedule[:] = (0.0, 1.0, 0.0, CLOCKS.index("grab"))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def slot(self, seq):
+        return self.frames[seq % self.slots]
+
+    def publish(self, seq):
+        self.header[0] = seq
+
+    def count(self, captures, detections):
+        self.header[1] = captures
+        self.header[2] = detections
+
+    def counters(self):
+        return int(self.header[1]), int(self.header[2])
+
+    def set_schedule(self, rate, scale):
+        self.schedule[:2] = (rate, scale)
+
+    def get_schedule(self):
+        return float(self.schedule[0]), float(self.schedule[1])
+
+    def set_age(self, age, clock):
+        self.schedule[2:] = (age, CLOCKS.index(clock))
+
+    def get_age(self):
+        return float(self.schedule[2])
+
+    def get_clock(self):
+        return CLOCKS[int(self.schedule[3])]
+
+    def latest(self):
+        """Return (seq, frame view) of the newest frame, seq is -1 if none"""
+        seq = int(self.header[0])
+        return seq, (self.frames[seq % self.slots] if seq >= 0 else None)
+
+    def close(self, unlink=False):
+        # Views have to go before the mapping can be closed
+        self.header = self.schedule = None
+        self.frames = []
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # a surface still wraps a frame, the OS frees it on exit
+        if unlink:
+            self.shm.unlink()
+
+def camera_worker(ring_name, size, slots, backend, source, pacing, detect_rate, detect_budget,
+                  low_latency, blink_queue, status_queue, stop_event):
+    """Capture + detection loop run in the worker process.
+
+    Puts None on status_queue once the source and detector are up, or the
+    error message if they failed, so the game isn't left waiting.
+    """
+    ring = FrameRing(size, slots, name=ring_name)
+    try:
+        camera = create_source(source, pacing, low_latency=low_latency)
+        if not camera.isOpened():
+            raise RuntimeError(f"could not open frame source {source!r}")
+        detector = create_detector(backend)
+    except Exception as e:
+        status_queue.put(f"{type(e).__name__}: {e}")
+        ring.close()
+        return
+    status_queue.put(None)
+    scheduler = DetectionScheduler(detect_rate, detect_budget)
+    pipeline = FramePipeline(size, buffers=0)
+    seq = 0
+    captures = detections = 0
+    age = 0.0
+    try:
+        while not stop_event.is_set() and camera.isOpened():
+            ret, frame = camera.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            # time.monotonic() is system-wide, valid across processes
+            captured, age = capture_time(camera, age)
+            ring.set_age(age, getattr(camera, "clock", "grab"))
+            captures += 1
+
+            if scheduler.due(captured):
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                detections += 1
+                if scheduler.detect(detector, gray):
+                    try:
+                        blink_queue.put_nowait(BlinkEvent(captured, time.monotonic()))
+                    except queue.Full:
+                        pass  # Skip if queue is full
+                ring.set_schedule(scheduler.rate, scheduler.scale)
+            ring.count(captures, detections)
+
+            pipeline.process(frame, out=ring.slot(seq))
+            ring.publish(seq)
+            seq += 1
+    finally:
+        camera.release()
+        ring.close()
+
+class CameraProcess:
+    """Capture and blink detection in a worker process.
+
+    Same interface as CameraThread. Frames come back through a FrameRing
+    in shared memory and blink events over a QueueBlinkChannel, so
+    detection doesn't compete with the pygame loop for the GIL.
+    """
+    def __init__(self, backend="dlib", source="camera:0", pacing="realtime",
+                 detect_rate=30, detect_budget=0.5, low_latency=True, slots=4):
+        ctx = mp.get_context("spawn")
+        self.ring = FrameRing(FRAME_SIZE, slots)
+        self.blinks = QueueBlinkChannel(ctx.Queue(maxsize=10))
+        self.status = ctx.Queue()
+        self.stop_event = ctx.Event()
+        self.process = ctx.Process(
+            target=camera_worker,
+            args=(self.ring.name, FRAME_SIZE, slots, backend, source, pacing,
+                  detect_rate, detect_budget, low_latency, self.blinks.source, self.status,
+                  self.stop_event),
+            daemon=True,
+        )
+        self.last_seq = -1
+
+    def start(self, timeout=60):
+        """Start the worker and wait until it has opened the source and
+        loaded the detector; raises RuntimeError if it couldn't"""
+        self.process.start()
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                error = self.status.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if not self.process.is_alive():
+                    error = f"camera worker exited with code {self.process.exitcode}"
+                    break
+                if time.monotonic() > deadline:
+                    error = f"camera worker not ready after {timeout}s"
+                    break
+        if error is not None:
+            self.stop()
+            self.join(timeout=2)
+            raise RuntimeError(error)
+
+    def latest_frame(self):
+        """Return a view of the newest frame in shared memory, or None if
+        nothing new was published since the last call"""
+        seq, frame = self.ring.latest()
+        if seq == self.last_seq:
+            return None
+        self.last_seq = seq
+        return frame
+
+    def to_surface(self, buffer):
+        return frame_surface(buffer, FRAME_SIZE)
+
+    def counters(self):
+        """(frames captured, frames detected) since start"""
+        return self.ring.counters()
+
+    def schedule(self):
+        """(detection rate, detection scale) the worker's scheduler settled on"""
+        return self.ring.get_schedule()
+
+    def age(self):
+        """Smoothed age of frames when they come out of the source"""
+        return self.ring.get_age()
+
+    def age_clock(self):
+        """What age() is measured from, one of sources.CLOCKS"""
+        return self.ring.get_clock()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def join(self, timeout=None):
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.ring.close(unlink=True)
+
+def create_camera(mode="thread", backend="dlib", source="camera:0", pacing="realtime",
+                  detect_rate=30, detect_budget=0.5, low_latency=True, address="127.0.0.1:5577"):
+    """Build the camera for config.CAMERA_MODE ("thread", "process" or "service").
+
+    source is a sources.py spec (camera:0, video:clip.mp4, synthetic, ...);
+    process mode needs a spec string since it is opened in the worker.
+    Service mode subscribes to service.py at `address` and ignores the
+    capture and detection settings, the service has its own.
+    """
+    if mode == "thread":
+        return CameraThread(backend, source, pacing, detect_rate, detect_budget, low_latency)
+    if mode == "process":
+        return CameraProcess(backend, source, pacing, detect_rate, detect_budget, low_latency)
+    if mode == "service":
+        from service import ServiceCamera  # service.py imports this module
+        return ServiceCamera(address)
+    raise ValueError(f"unknown camera mode {mode!r}, expected 'thread', 'process' or 'service'")
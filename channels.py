@@ -0,0 +1,78 @@
+import time
+import queue
+from collections import deque, namedtuple
+
+# -------------------------------
+# Camera -> game channels
+# -------------------------------
+
+# timestamp: time.monotonic() at capture of the frame the blink ended on
+# detected:  time.monotonic() when detect_blink() returned for that frame
+BlinkEvent = namedtuple("BlinkEvent", "timestamp detected")
+
+class FrameMailbox:
+    """Single-slot "latest frame" mailbox.
+
+    The producer overwrites the slot, the consumer reads (seq, frame) and
+    compares seq with the last one it uploaded to skip frames it already
+    has. Swapping one tuple is atomic under the GIL, so no lock is needed.
+    """
+    def __init__(self):
+        self._latest = (-1, None)
+
+    def put(self, frame):
+        seq = self._latest[0] + 1
+        self._latest = (seq, frame)
+        return seq
+
+    def get(self):
+        """Return (seq, frame) of the newest frame, seq is -1 if none yet"""
+        return self._latest
+
+class BlinkChannel:
+    """Timestamped blink events from the camera to the game.
+
+    Old events fall off the bounded deque; the consumer drops stale ones
+    by capture time instead of flushing the whole channel.
+    """
+    def __init__(self, maxlen=10):
+        self.events = deque(maxlen=maxlen)
+
+    def push(self, event):
+        self.events.append(event)
+
+    def pending(self):
+        """Move events from any upstream source into self.events"""
+
+    def drain(self, since=None, max_age=None, now=None):
+        """Remove and return events captured after `since` and at most
+        `max_age` seconds ago"""
+        self.pending()
+        if now is None:
+            now = time.monotonic()
+        events = []
+        while self.events:
+            event = self.events.popleft()
+            if since is not None and event.timestamp < since:
+                continue
+            if max_age is not None and now - event.timestamp > max_age:
+                continue
+            events.append(event)
+        return events
+
+    def clear(self):
+        self.pending()
+        self.events.clear()
+
+class QueueBlinkChannel(BlinkChannel):
+    """BlinkChannel fed through a multiprocessing queue by another process"""
+    def __init__(self, source, maxlen=10):
+        super().__init__(maxlen)
+        self.source = source
+
+    def pending(self):
+        while True:
+            try:
+                self.events.append(self.source.get_nowait())
+            except queue.Empty:
+                break
@@ -0,0 +1,69 @@
+import os
+
+# -------------------------------
+# Game configuration
+# -------------------------------
+# Every setting can be overridden with a TOWERBROCK_* environment variable,
+# e.g. TOWERBROCK_DETECTOR=opencv python main.py
+
+# Blink detection backend: "dlib" (HOG + 68 landmarks, needs the .dat
+# model) or "opencv" (Haar cascades shipped with opencv-python)
+DETECTOR_BACKEND = os.environ.get("TOWERBROCK_DETECTOR", "dlib")
+
+# Where capture + detection run: "thread" (same process), "process"
+# (worker process with a shared-memory frame ring, avoids GIL contention)
+# or "service" (subscribe to a running service.py at SERVICE_ADDRESS, so
+# several games can share one camera)
+CAMERA_MODE = os.environ.get("TOWERBROCK_CAMERA_MODE", "thread")
+SERVICE_ADDRESS = os.environ.get("TOWERBROCK_SERVICE", "127.0.0.1:5577")
+
+# Blinks captured longer ago than this (seconds) are dropped as stale
+BLINK_MAX_AGE = float(os.environ.get("TOWERBROCK_BLINK_MAX_AGE", "0.5"))
+
+# Write blink-to-drop latency histograms (JSON) here on exit, "" = off
+LATENCY_LOG = os.environ.get("TOWERBROCK_LATENCY_LOG", "")
+
+# Game logic runs at a fixed TICK_RATE (Hz) whatever the render rate is.
+# Lower RENDER_FPS on weak machines without changing gameplay.
+TICK_RATE = int(os.environ.get("TOWERBROCK_TICK_RATE", "60"))
+RENDER_FPS = int(os.environ.get("TOWERBROCK_RENDER_FPS", "60"))
+# Draw moving sprites between the last two ticks
+INTERPOLATE = os.environ.get("TOWERBROCK_INTERPOLATE", "1") != "0"
+
+# Where frames come from (see sources.py): camera:0, video:clip.mp4,
+# images:frames/, synthetic. Pacing for files/synthetic: realtime, fast
+# or a frame rate.
+FRAME_SOURCE = os.environ.get("TOWERBROCK_SOURCE", "camera:0")
+SOURCE_PACING = os.environ.get("TOWERBROCK_SOURCE_PACING", "realtime")
+
+# "classic" or "endless" (world-space tower and scrolling viewport, built
+# for very tall towers)
+GAME_MODE = os.environ.get("TOWERBROCK_MODE", "classic")
+
+# Blink detection runs at up to DETECT_RATE Hz on the freshest frame,
+# using at most DETECT_BUDGET of one CPU core. When it can't keep up the
+# rate drops, then the detection resolution (see camera.DetectionScheduler).
+DETECT_RATE = float(os.environ.get("TOWERBROCK_DETECT_RATE", "30"))
+DETECT_BUDGET = float(os.environ.get("TOWERBROCK_DETECT_BUDGET", "0.5"))
+
+# Audio mixer: sample rate and buffer size in samples. Every sound waits
+# up to one buffer before it is heard (512 at 44.1 kHz ~ 12 ms); raise it
+# if the sound crackles.
+AUDIO_RATE = int(os.environ.get("TOWERBROCK_AUDIO_RATE", "44100"))
+AUDIO_BUFFER = int(os.environ.get("TOWERBROCK_AUDIO_BUFFER", "512"))
+
+# Low-latency capture: one-frame driver queue and MJPG where the camera
+# supports them, and stale queued frames skipped with grab() before each
+# decode. Paced video/synthetic sources emulate a 4-frame driver queue.
+LOW_LATENCY_CAPTURE = os.environ.get("TOWERBROCK_LOW_LATENCY", "1") != "0"
+
+# Make every rotated block sprite (~13 ms) while the start screen is up,
+# so the first falling blocks don't build the rotation cache mid-game
+PRERENDER_ROTATIONS = os.environ.get("TOWERBROCK_PRERENDER_ROTATIONS", "1") != "0"
+
+# Presentation: "surface" (blit onto the display surface) or "renderer"
+# (SDL2 textures, the renderer scales 800x600 to the window; falls back
+# to SDL's software renderer without a GPU). FULLSCREEN=1 with the
+# renderer runs at the desktop's native resolution.
+DISPLAY_BACKEND = os.environ.get("TOWERBROCK_DISPLAY", "surface")
+FULLSCREEN = os.environ.get("TOWERBROCK_FULLSCREEN", "0") == "1"
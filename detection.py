@@ -0,0 +1,331 @@
+import cv2
+from scipy.spatial import distance as dist
+
+try:
+    import dlib
+    from imutils import face_utils
+except ImportError:  # dlib is optional when using the OpenCV backend
+    dlib = None
+
+# -------------------------------
+# Blink detection backends
+# -------------------------------
+
+def eye_aspect_ratio(eye):
+    A = dist.euclidean(eye[1], eye[5])
+    B = dist.euclidean(eye[2], eye[4])
+    C = dist.euclidean(eye[0], eye[3])
+    return (A + B) / (2.0 * C)
+
+def overlap(a, b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    w = min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0])
+    h = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    return inter / (a[2] * a[3] + b[2] * b[3] - inter)
+
+class FaceSelector:
+    """Picks the player's face when several people are in view.
+
+    Faces are matched to the previous frame's by overlap, so each one keeps
+    an identity while it moves. The primary face is the one with the best
+    score (bigger and closer to the frame center is better), with
+    hysteresis: a challenger has to beat the primary by SWITCH_MARGIN for
+    SWITCH_FRAMES detections in a row, so a bystander leaning in for a
+    moment doesn't take over.
+    """
+    def __init__(self):
+        self.MATCH_OVERLAP = 0.3  # IoU for "same face as last frame"
+        self.MAX_MISSED = 5  # detections a face may be missing before it's forgotten
+        self.SWITCH_MARGIN = 1.5
+        self.SWITCH_FRAMES = 5
+        self.faces = {}  # identity -> [box, missed]
+        self.next_id = 0
+        self.primary = None
+        self.challenger = None
+        self.challenger_frames = 0
+
+    def reset(self):
+        self.faces.clear()
+        self.primary = None
+        self.challenger = None
+        self.challenger_frames = 0
+
+    @staticmethod
+    def score(box, frame_size):
+        """Face area, discounted by distance from the frame center"""
+        x, y, w, h = box
+        width, height = frame_size
+        dx = (x + w / 2 - width / 2) / width
+        dy = (y + h / 2 - height / 2) / height
+        return w * h * max(0.0, 1.0 - (dx * dx + dy * dy) ** 0.5)
+
+    def match(self, boxes):
+        """Assign identities to this frame's boxes, return {identity: box}"""
+        seen = {}
+        pairs = sorted(((overlap(face[0], box), identity, i)
+                        for identity, face in self.faces.items()
+                        for i, box in enumerate(boxes)), reverse=True)
+        used = set()
+        for iou, identity, i in pairs:
+            if iou < self.MATCH_OVERLAP:
+                break
+            if identity in seen or i in used:
+                continue
+            seen[identity] = boxes[i]
+            used.add(i)
+        for i, box in enumerate(boxes):
+            if i not in used:
+                seen[self.next_id] = box
+                self.next_id += 1
+
+        for identity in list(self.faces):
+            if identity not in seen:
+                self.faces[identity][1] += 1
+                if self.faces[identity][1] > self.MAX_MISSED:
+                    del self.faces[identity]
+        for identity, box in seen.items():
+            self.faces[identity] = [box, 0]
+        return seen
+
+    def select(self, boxes, frame_size):
+        """Return (identity, box) of the primary face, or (None, None)"""
+        seen = self.match(boxes)
+        if not seen:
+            return None, None
+        scores = {identity: self.score(box, frame_size) for identity, box in seen.items()}
+        best = max(scores, key=scores.get)
+
+        if self.primary not in self.faces:
+            self.primary = best  # no player yet, or the player left
+            self.challenger = None
+        elif self.primary not in seen:
+            pass  # missed for a frame, keep the seat
+        elif best != self.primary and scores[best] > self.SWITCH_MARGIN * scores[self.primary]:
+            if best == self.challenger:
+                self.challenger_frames += 1
+            else:
+                self.challenger = best
+                self.challenger_frames = 1
+            if self.challenger_frames >= self.SWITCH_FRAMES:
+                self.primary = best
+                self.challenger = None
+        else:
+            self.challenger = None
+
+        return self.primary, seen.get(self.primary)
+
+    def follow(self, box):
+        """Update the primary face's box from a tracker between detections"""
+        if self.primary in self.faces:
+            self.faces[self.primary][0] = box
+
+class BlinkDetector:
+    """Common interface for blink detection backends.
+
+    Subclasses implement detect_blink(gray_frame, face_scale) and report each frame's
+    eye state through eyes_closed(), which turns runs of closed frames
+    into blinks. Blink state is kept per face identity (see FaceSelector),
+    so a half-finished blink never carries over to another person.
+    """
+    name = None
+
+    def __init__(self):
+        self.EYE_AR_CONSEC_FRAMES = 2  # Faster detection (was 3)
+        self.DETECT_SCALE = 1.0  # backends may detect faces on a smaller frame
+        # Face detection never runs below this fraction of the frame size,
+        # whatever the backend scale times the scheduler's scale comes to
+        self.MIN_DETECT_SCALE = 0.5
+        self.counters = {}  # face identity -> closed frames in a row
+        self.selector = FaceSelector()
+
+    def eyes_closed(self, closed, face=None):
+        """Feed one frame's eye state, return True when a blink just ended"""
+        if closed:
+            self.counters[face] = self.counters.get(face, 0) + 1
+            return False
+        blink_detected = self.counters.pop(face, 0) >= self.EYE_AR_CONSEC_FRAMES
+        return blink_detected
+
+    def primary_face(self, boxes, gray_frame):
+        """Pick the player among (x, y, w, h) boxes, return (identity, box)"""
+        identity, box = self.selector.select(boxes, gray_frame.shape[1::-1])
+        for face in list(self.counters):
+            if face not in self.selector.faces:
+                del self.counters[face]  # forgotten faces
+        return identity, box
+
+    def reset(self):
+        """Forget per-frame state, e.g. when the frame size changes"""
+        self.counters.clear()
+        self.selector.reset()
+
+    def lowest_face_scale(self):
+        """Smallest scheduler scale that still shrinks face detection
+        (1.0 when the backend is already at MIN_DETECT_SCALE)"""
+        return self.MIN_DETECT_SCALE / self.DETECT_SCALE
+
+    def face_scale(self, scale):
+        """Combined face detection scale: backend's DETECT_SCALE times the
+        scheduler's, floored at MIN_DETECT_SCALE"""
+        return max(self.MIN_DETECT_SCALE, min(1.0, self.DETECT_SCALE * scale))
+
+    def detect_blink(self, gray_frame, face_scale=1.0):
+        """Process a frame and return blink_detected (True/False).
+
+        face_scale shrinks only the face detection step (see
+        camera.DetectionScheduler), landmarks use the full frame.
+        """
+        raise NotImplementedError
+
+class DlibBlinkDetector(BlinkDetector):
+    """HOG face detection + 68-landmark predictor, eye aspect ratio test"""
+    name = "dlib"
+
+    def __init__(self, tracking=True, detect_scale=1.0,
+                 predictor_path="shape_predictor_68_face_landmarks.dat"):
+        super().__init__()
+        if dlib is None:
+            raise RuntimeError("the dlib backend needs dlib and imutils installed")
+        self.EYE_AR_THRESH = 0.25  # Increased sensitivity (was 0.22)
+        # Tracking mode: full HOG detection only at startup, when the track
+        # is lost and every DETECT_EVERY frames. In between the face is
+        # followed by a correlation tracker.
+        self.DETECT_EVERY = 15
+        # HOG's smallest face is 80x80 px of the detection frame, so below
+        # 1.0 the smallest face found grows (160 px at 0.5) and far away
+        # players are missed. Compare with benchmarks.detectors first.
+        self.DETECT_SCALE = detect_scale
+        self.TRACK_MIN_QUALITY = 7.0  # tracker PSR below this = track lost
+        self.tracking = tracking
+        self.tracker = None
+        self.frames_since_detect = 0
+        self.detector = dlib.get_frontal_face_detector()
+        self.predictor = dlib.shape_predictor(predictor_path)
+        self.lStart, self.lEnd = face_utils.FACIAL_LANDMARKS_IDXS["left_eye"]
+        self.rStart, self.rEnd = face_utils.FACIAL_LANDMARKS_IDXS["right_eye"]
+
+    def reset(self):
+        super().reset()
+        self.tracker = None
+
+    def detect_faces(self, gray_frame, face_scale=1.0):
+        """Run HOG detection, on a downscaled copy below scale 1"""
+        scale = self.face_scale(face_scale)
+        if scale == 1:
+            return list(self.detector(gray_frame, 0))
+        small = cv2.resize(gray_frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return [dlib.rectangle(int(r.left() / scale), int(r.top() / scale),
+                               int(r.right() / scale), int(r.bottom() / scale))
+                for r in self.detector(small, 0)]
+
+    def select_face(self, gray_frame, rects):
+        """Primary face among dlib rects, return (identity, rect)"""
+        boxes = [(r.left(), r.top(), r.width(), r.height()) for r in rects]
+        identity, box = self.primary_face(boxes, gray_frame)
+        if box is None:
+            return None, None
+        return identity, rects[boxes.index(box)]
+
+    def track_face(self, gray_frame, face_scale=1.0):
+        """Return (identity, rect) of the player's face, following it with
+        the tracker between detections"""
+        if self.tracker is not None and self.frames_since_detect < self.DETECT_EVERY:
+            quality = self.tracker.update(gray_frame)
+            if quality >= self.TRACK_MIN_QUALITY:
+                self.frames_since_detect += 1
+                pos = self.tracker.get_position()
+                face = dlib.rectangle(int(pos.left()), int(pos.top()),
+                                      int(pos.right()), int(pos.bottom()))
+                self.selector.follow((face.left(), face.top(), face.width(), face.height()))
+                return self.selector.primary, face
+            self.tracker = None  # track lost
+
+        self.frames_since_detect = 0
+        identity, face = self.select_face(gray_frame, self.detect_faces(gray_frame, face_scale))
+        if face is None:
+            self.tracker = None
+            return None, None
+        self.tracker = dlib.correlation_tracker()
+        self.tracker.start_track(gray_frame, face)
+        return identity, face
+
+    def detect_blink(self, gray_frame, face_scale=1.0):
+        if self.tracking:
+            identity, rect = self.track_face(gray_frame, face_scale)
+        else:
+            identity, rect = self.select_face(gray_frame, self.detect_faces(gray_frame, face_scale))
+        if rect is None:
+            return False
+
+        # Landmarks only for the player's face, however many are in view
+        shape = self.predictor(gray_frame, rect)
+        shape = face_utils.shape_to_np(shape)
+
+        # Blink detection
+        leftEye = shape[self.lStart:self.lEnd]
+        rightEye = shape[self.rStart:self.rEnd]
+        leftEAR = eye_aspect_ratio(leftEye)
+        rightEAR = eye_aspect_ratio(rightEye)
+        ear = (leftEAR + rightEAR) / 2.0
+
+        return self.eyes_closed(ear < self.EYE_AR_THRESH, identity)
+
+class OpenCVBlinkDetector(BlinkDetector):
+    """Cascade face + eye detection shipped with opencv-python.
+
+    No model download needed and much cheaper than dlib. The eyes count as
+    closed when a face is found but no open eye is detected inside it.
+    Any cascade file (e.g. an LBP face cascade) can be passed in.
+    """
+    name = "opencv"
+
+    def __init__(self, face_cascade="haarcascade_frontalface_default.xml",
+                 eye_cascade="haarcascade_eye_tree_eyeglasses.xml"):
+        super().__init__()
+        self.DETECT_SCALE = 0.5
+        self.face_cascade = self.load_cascade(face_cascade)
+        self.eye_cascade = self.load_cascade(eye_cascade)
+
+    @staticmethod
+    def load_cascade(filename):
+        path = filename if "/" in filename else cv2.data.haarcascades + filename
+        cascade = cv2.CascadeClassifier(path)
+        if cascade.empty():
+            raise RuntimeError(f"could not load cascade {path}")
+        return cascade
+
+    def detect_faces(self, gray_frame, face_scale=1.0):
+        """Return (x, y, w, h) face boxes in full-frame coordinates"""
+        scale = self.face_scale(face_scale)
+        small = cv2.resize(gray_frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        faces = self.face_cascade.detectMultiScale(small, scaleFactor=1.1, minNeighbors=5,
+                                                   minSize=(40, 40))
+        return [tuple(int(v / scale) for v in face) for face in faces]
+
+    def detect_blink(self, gray_frame, face_scale=1.0):
+        identity, face = self.primary_face(self.detect_faces(gray_frame, face_scale), gray_frame)
+        if face is None:
+            return False
+        x, y, w, h = face
+        # Eyes sit in the upper part of the face box
+        roi = gray_frame[y:y + int(h * 0.6), x:x + w]
+        eyes = self.eye_cascade.detectMultiScale(roi, scaleFactor=1.1, minNeighbors=3,
+                                                 minSize=(w // 8, w // 8))
+        return self.eyes_closed(len(eyes) == 0, identity)
+
+BACKENDS = {
+    DlibBlinkDetector.name: DlibBlinkDetector,
+    OpenCVBlinkDetector.name: OpenCVBlinkDetector,
+}
+
+def create_detector(backend="dlib", **kwargs):
+    """Build the blink detector for a backend name (see BACKENDS)"""
+    try:
+        cls = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"unknown blink detector backend {backend!r}, "
+                         f"expected one of {sorted(BACKENDS)}") from None
+    return cls(**kwargs)
@@ -0,0 +1,430 @@
+from array import array
+from math import sin, cos
+import random
+
+# -------------------------------
+# Game rules
+# -------------------------------
+# Pure game state: no pygame, camera or display, so games can be simulated
+# headless (see headless.py). main.py subclasses Block and Tower to draw them.
+
+#gravity settings
+grav = 0.5
+rope_length = 120
+max_force = 0.05  # swing force stops ramping here (~200 blocks), long towers stay playable
+origin = (400,3)
+
+class Block:
+    def __init__(self):
+        self.x = 37
+        self.y = 150
+        self.xlast = 0
+        self.xchange = 100
+        self.speed = 0
+        self.acceleration = 0
+        self.speedmultiplier = 1
+        self.force = -0.001  # swing force, ramps up on every respawn
+        # ready, dropped , landed, scroll ,over, miss
+        self.state = "ready"
+        self.angle = 45
+        self.rotation = None  # angle the sprite is drawn at while falling
+        self.snapshot()
+
+    def snapshot(self):
+        """Remember the position before a simulation tick (for interpolation)"""
+        self.prev_x = self.x
+        self.prev_y = self.y
+
+    def render_pos(self, alpha=1.0):
+        """Position between the last two ticks, alpha in [0, 1]"""
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+
+    def swing(self, tower_level=0):
+        """Original swinging behavior (no nose control)"""
+        self.x = 370 + rope_length * sin(self.angle)
+        self.y = 20 + rope_length * cos(self.angle)
+        self.angle += self.speed
+        self.acceleration = sin(self.angle) * self.force
+        self.speed += self.acceleration
+
+    def drop(self, tower):
+        if self.state == "ready":
+            self.state = "dropped"
+            self.xlast = self.x
+
+        if self.collided(tower):
+            self.state = "landed"
+
+        if tower.size == 0 and self.y>=536:
+            self.state = "landed"
+
+        if tower.size >=1 and self.y>=536:
+            self.state = "miss"
+
+        if self.state == "dropped":
+            self.speed += grav
+            self.y += self.speed
+
+    def get_state(self):
+        return self.state
+
+    def collided(self,tower):
+        # check if fits
+        if tower.size == 0:
+            return False
+        if (self.xlast < tower.xlist[-1] + 60) and (self.xlast > tower.xlist[-1] - 60) and (tower.y - self.y <= 70 ):
+            if (self.xlast < tower.xlist[-1] + 5) and (self.xlast > tower.xlist[-1] - 5):
+                tower.golden = True
+            else:
+                tower.golden = False
+            return True
+        else:
+            return False
+
+    def to_build(self,tower):
+        self.state = "scroll"
+        if tower.size == 0 or self.collided(tower):
+            return True
+        return False
+
+    def collapse(self, tower):
+        if tower.toppling():
+            if self.collided(tower):
+                self.state = "over"
+
+    def rotate(self,direction):
+        self.rotation = self.angle
+        if direction == "l":
+            self.angle += 1 % 360
+        if direction == "r":
+            self.angle -= 1 % 360
+
+    def to_fall(self, tower):
+        self.y += 5
+
+        if (self.xlast < tower.xlist[-2] + 30):
+            self.x -= 2
+            self.rotate("l")
+
+        elif (self.xlast > tower.xlist[-2] - 30):
+            self.x += 2
+            self.rotate("r")
+
+    def respawn(self, tower):
+        if tower.size%2 ==0:
+            self.angle = -45
+        else:
+            self.angle = 45
+        self.y = 150
+        self.x = 370
+        self.speed = 0
+        self.state = "ready"
+        self.snapshot()  # teleported, don't interpolate from the old spot
+        self.force = max(-max_force, min(max_force, self.force * 1.02))
+
+class Viewport:
+    """Vertical camera for endless mode, in world coordinates.
+
+    World y grows up from the ground and block i spans [i*64, (i+1)*64).
+    bottom is the world height at the bottom edge of the screen; it only
+    ever scrolls up, so nothing is snapped back or renumbered.
+    """
+    def __init__(self, screen_height=600):
+        self.screen_height = screen_height
+        self.bottom = 0
+
+    def to_screen(self, world_y):
+        return self.screen_height - (world_y - self.bottom)
+
+    def visible_levels(self, count):
+        """(first, end) block levels that reach into the screen"""
+        first = min(count, int(self.bottom // 64))
+        last = int((self.bottom + self.screen_height) // 64) + 1
+        return first, min(count, last)
+
+class Tower:
+    # Stability: every block weighs the same and sits at its x. The blocks
+    # above a level topple once their center of mass is more than SUPPORT
+    # px off that level's block. Prefix sums of xlist give the center of
+    # mass above any level in O(1); after each build the base and the top
+    # CHECK_LEVELS levels (where a new block moves the center of mass the
+    # most) are checked, so the cost doesn't grow with the tower.
+    SUPPORT = 40
+    CHECK_LEVELS = 8
+
+    def __init__(self, rng=None, endless=False):
+        self.rng = rng or random.Random()  # shake randomness
+        # endless mode places the tower in world space under a Viewport
+        # instead of the classic onscreen/height/y bookkeeping
+        self.viewport = Viewport() if endless else None
+        self.size = 0
+        self.xbase = 0
+        self.y = 600
+        self.x = 0
+        self.height = 0
+        # Compact storage, 8 bytes a block, for towers of 100k+ blocks
+        self.xlist = array("d")
+        self.prefix = array("d", [0])  # prefix[i] = sum(xlist[:i])
+        self.tilt = 0.0  # worst overhang / SUPPORT, 1.0 = about to topple
+        self.onscreen = 0
+        self.change = 0
+        self.speed = 0.4
+        self.wobbling = False
+        self.scrolling = False
+        self.golden = False
+        self.display_status = True
+
+        # Shaking system
+        self.shake_x = 0
+        self.shake_y = 0
+        self.shake_intensity = 0
+        self.shake_timer = 0
+        self.base_shake_speed = 8  # How fast the shake oscillates
+        self.snapshot()
+
+    def snapshot(self):
+        """Remember y/wobble before a simulation tick (for interpolation)"""
+        self.prev_y = self.y
+        self.prev_change = self.change
+
+    def get_display(self):
+        return self.display_status
+
+    def is_scrolling(self):
+        return self.scrolling
+
+    def is_golden(self):
+        return self.golden
+
+    def build(self, xlast):
+        self.size += 1
+        self.onscreen += 1
+
+        if self.size == 1:
+            self.xbase = xlast
+            self.xlist.append(self.xbase)
+        else:
+            self.xlist.append(xlast)
+        self.prefix.append(self.prefix[-1] + xlast)
+        self.update_stability()
+
+        if self.viewport is not None:
+            self.y = self.viewport.to_screen(self.size * 64)
+            self.height += 64
+        elif self.size <= 5:
+            self.height = self.size * 64
+            self.y = 600 - self.height
+        else:
+            self.height += 64
+            self.y -= 64
+        self.prev_y = self.y  # new block, don't glide the tower down
+
+    def center_of_mass(self, level=0):
+        """Mean x of the blocks from `level` up"""
+        n = len(self.xlist)
+        if level >= n:
+            return None
+        return (self.prefix[n] - self.prefix[level]) / (n - level)
+
+    def overhang(self, level):
+        """How far the blocks above `level` lean past that level's block"""
+        if level + 1 >= len(self.xlist):
+            return 0.0
+        return self.center_of_mass(level + 1) - self.xlist[level]
+
+    def update_stability(self):
+        top = len(self.xlist) - 1
+        levels = range(max(0, top - self.CHECK_LEVELS), top)
+        worst = max((abs(self.overhang(level)) for level in levels), default=0.0)
+        if top > 0:
+            worst = max(worst, abs(self.overhang(0)))
+        self.tilt = worst / self.SUPPORT
+
+    def toppling(self):
+        return self.tilt > 1.0
+
+    def window(self):
+        """Return the (start, end) slice of xlist that is on screen"""
+        end = len(self.xlist)
+        if self.viewport is not None:
+            return self.viewport.visible_levels(end)
+        return max(0, end - self.onscreen), end
+
+    def unbuild(self, brock):
+        self.display_status = False
+        if self.y > brock.y:
+            brock.y = self.y
+            self.size -= 1
+
+    def collapse(self, direction):
+        self.y += 5
+        if direction == "l":
+            self.x -=5
+        elif direction == "r":
+            self.x += 5
+
+    def height_multiplier(self):
+        # Taller towers sway more for the same lean
+        return min(1.5, 1 + (self.size * 0.05))
+
+    def wobble(self):
+        # Sway amplitude follows how close the tower is to toppling
+        amplitude = min(20, 20 * self.tilt * self.height_multiplier())
+        self.wobbling = amplitude >= 2
+
+        if self.wobbling:
+            self.change += self.speed
+        elif self.change:
+            # settle back once the tower is steady again
+            self.change = max(0, self.change - 0.4) if self.change > 0 else min(0, self.change + 0.4)
+
+        if self.change > amplitude:
+            self.speed = -0.4
+        elif self.change < -amplitude:
+            self.speed = 0.4
+
+        # Calculate shake intensity based on tower instability
+        self.calculate_shake_intensity()
+
+        # Apply shaking if intensity > 0
+        if self.shake_intensity > 0:
+            self.update_shake()
+
+    def calculate_shake_intensity(self):
+        """Calculate how much the tower should shake based on instability"""
+        # Light (1) from 20% of the way to toppling up to extreme (4) from 80%
+        base_intensity = min(4, int(self.tilt * 5))
+
+        # Increase intensity with tower height
+        self.shake_intensity = int(base_intensity * self.height_multiplier())
+
+    def update_shake(self):
+        """Update the shake offset based on intensity"""
+        if self.shake_intensity <= 0:
+            self.shake_x = 0
+            self.shake_y = 0
+            return
+
+        self.shake_timer += 1
+        rng = self.rng
+
+        # Different shake patterns based on intensity
+        if self.shake_intensity == 1:  # Light shake
+            self.shake_x = rng.randint(-1, 1)
+            self.shake_y = rng.randint(-1, 1) if self.shake_timer % 3 == 0 else 0
+
+        elif self.shake_intensity == 2:  # Medium shake
+            self.shake_x = rng.randint(-2, 2)
+            self.shake_y = rng.randint(-1, 1)
+
+        elif self.shake_intensity == 3:  # Heavy shake
+            self.shake_x = rng.randint(-4, 4)
+            self.shake_y = rng.randint(-2, 2)
+
+        elif self.shake_intensity >= 4:  # Extreme shake
+            self.shake_x = rng.randint(-6, 6)
+            self.shake_y = rng.randint(-3, 3)
+            # Add some extra violent movements
+            if self.shake_timer % 5 == 0:
+                self.shake_x += rng.choice([-3, 3])
+                self.shake_y += rng.choice([-2, 2])
+
+    def scroll(self):
+        if self.viewport is not None:
+            # same motion as classic mode, but the viewport moves, not the tower
+            self.scrolling = self.y <= 440
+            if self.scrolling:
+                self.viewport.bottom += 5
+                self.y = self.viewport.to_screen(self.size * 64)
+            else:
+                self.height = 600 - self.y
+            return
+        if self.y <= 440:
+            self.y +=5
+            self.scrolling = True
+        else:
+            self.height = 160
+            self.scrolling = False
+            self.onscreen = 3
+
+    def reset(self):
+        if self.viewport is None and self.onscreen >=7:
+            self.onscreen = 3
+            self.y = 440
+            self.prev_y = self.y
+
+        # Reset shake effects when tower resets
+        self.shake_x = 0
+        self.shake_y = 0
+        self.shake_intensity = 0
+        self.shake_timer = 0
+
+class Game:
+    """One game of Tower Brocks: a block, a tower, score and game over.
+
+    step() advances one fixed simulation tick and returns the events that
+    happened ("build", "gold", "over", "miss") so the caller can play
+    sounds. make_block/make_tower let main.py plug in drawable subclasses.
+    """
+    def __init__(self, make_block=Block, make_tower=Tower, seed=None):
+        self.make_block = make_block
+        self.make_tower = make_tower
+        self.rng = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        self.block = self.make_block()
+        self.tower = self.make_tower()
+        self.tower.rng = self.rng
+        self.score = 0
+        self.over = False
+        self.ticks = 0
+
+    def step(self, drop=False):
+        """Advance one tick; drop=True releases the block if it is swinging"""
+        block = self.block
+        tower = self.tower
+        events = []
+        block.snapshot()
+        tower.snapshot()
+
+        # ---- Control system ----
+        if drop and block.state == "ready":
+            block.drop(tower)
+
+        if block.state == "ready":
+            block.swing(tower.size)
+        if block.state == "dropped":
+            block.drop(tower)
+        if block.state == "landed":
+            if block.to_build(tower):
+                tower.build(block.xlast)
+                if tower.is_golden():
+                    self.score += 2
+                    events.append("gold")
+                else:
+                    self.score += 1
+                    events.append("build")
+            if tower.size >= 2:
+                block.collapse(tower)
+        if block.state == "over":
+            tower.unbuild(block)
+            block.to_fall(tower)
+            self.over = True
+            events.append("over")
+
+        if block.state == "miss":
+            self.over = True
+            events.append("miss")
+
+        if block.state == "scroll" and not tower.is_scrolling():
+            block.respawn(tower)
+            if tower.size >= 5:
+                tower.reset()
+        if tower.height >= 64*5 and tower.size >= 5:
+            tower.scroll()
+
+        tower.wobble()
+        self.ticks += 1
+        return events
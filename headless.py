@@ -0,0 +1,172 @@
+"""Run Tower Brocks games without a window, audio or camera.
+
+    python headless.py --games 5000 --seed 1
+    python headless.py --drops 40,95,150,210     # one scripted game
+    python headless.py --stress 100000           # endless tower, attract-mode stress
+
+Games are driven by scripted drop ticks or by a policy deciding on every
+tick whether to drop. Useful for difficulty tuning and regression runs.
+"""
+import argparse
+import random
+import sys
+import time
+from collections import namedtuple
+from functools import partial
+from math import sin
+
+from game import Game, Tower, rope_length
+
+GameResult = namedtuple("GameResult", "score size ticks reason")
+
+
+def run_game(drops=None, policy=None, seed=None, max_ticks=100000, endless=False, max_blocks=None):
+    """Play one game headless.
+
+    drops:  increasing tick numbers at which the block is released
+    policy: callable(game) -> bool, asked every tick instead of drops
+    """
+    game = Game(make_tower=partial(Tower, endless=endless), seed=seed)
+    drops = iter(drops or ())
+    next_drop = next(drops, None)
+    reason = "timeout"
+    while game.ticks < max_ticks:
+        if policy is not None:
+            drop = policy(game)
+        else:
+            drop = next_drop is not None and game.ticks >= next_drop
+            if drop and game.block.state == "ready":
+                next_drop = next(drops, None)
+            elif drop:
+                drop = False  # not swinging yet, keep the drop pending
+        for event in game.step(drop=drop):
+            if event in ("over", "miss"):
+                reason = event
+        if game.over:
+            break
+        if max_blocks is not None and game.tower.size >= max_blocks:
+            reason = "max blocks"
+            break
+        if policy is None and next_drop is None and game.block.state == "ready":
+            reason = "script ended"
+            break
+    return GameResult(game.score, game.tower.size, game.ticks, reason)
+
+
+def random_delay_policy(rng, low=20, high=90):
+    """Drop after a random number of ticks of swinging, like a player would"""
+    state = {"wait": rng.randint(low, high)}
+
+    def policy(game):
+        if game.block.state != "ready":
+            return False
+        state["wait"] -= 1
+        if state["wait"] <= 0:
+            state["wait"] = rng.randint(low, high)
+            return True
+        return False
+    return policy
+
+
+def steady_policy():
+    """Drop where the next block pulls the tower's center of mass back over
+    its base, like a very good player. Used for the endless stress run."""
+    state = {"armed": False}
+
+    def policy(game):
+        block, tower = game.block, game.tower
+        if block.state != "ready" or block.speed == 0:
+            state["armed"] = False
+            return False
+        if state["armed"]:  # target was closest to this tick's position
+            state["armed"] = False
+            return True
+        if tower.xlist:
+            top = tower.xlist[-1]
+            # x that puts the center of mass above the base back on the base
+            ideal = tower.xbase * len(tower.xlist) - (tower.prefix[-1] - tower.xbase)
+            target = max(top - 15, min(top + 15, ideal))
+        else:
+            target = 370
+        # block.x is where a drop now lands; the angle has already advanced
+        x, x_next = block.x, 370 + rope_length * sin(block.angle)
+        if (x - target) * (x_next - target) > 0:
+            return False  # target isn't passed before the next tick
+        if abs(x - target) <= abs(x_next - target):
+            return True
+        state["armed"] = True
+        return False
+    return policy
+
+
+def tower_bytes(tower):
+    """Bytes allocated for the tower's per-block storage (xlist + prefix
+    sums, over-allocation included)"""
+    return sys.getsizeof(tower.xlist) + sys.getsizeof(tower.prefix)
+
+
+def stress(blocks, seed=0):
+    """Build an endless tower of `blocks` blocks, report speed and memory"""
+    steady = steady_policy()
+    samples = {}  # tower size -> storage bytes, halfway and at the end
+    games = []
+
+    def policy(game):
+        if not games:
+            games.append(game)
+        if not samples and game.tower.size >= blocks // 2:
+            samples[game.tower.size] = tower_bytes(game.tower)
+        return steady(game)
+
+    start = time.perf_counter()
+    result = run_game(policy=policy, seed=seed, endless=True,
+                      max_ticks=blocks * 1000, max_blocks=blocks)
+    elapsed = time.perf_counter() - start
+    samples[result.size] = tower_bytes(games[0].tower)
+    print(f"{result.size} blocks ({result.reason}) in {elapsed:.1f}s, "
+          f"{result.ticks / elapsed:.0f} ticks/s, {result.ticks / max(1, result.size):.0f} ticks/block")
+    for size, used in sorted(samples.items()):
+        print(f"  tower storage at {size} blocks: {used / 1024:.0f} KiB, "
+              f"{used / max(1, size):.1f} bytes/block")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--drops", help="comma separated drop ticks for a single scripted game")
+    parser.add_argument("--max-ticks", type=int, default=100000)
+    parser.add_argument("--endless", action="store_true", help="endless mode towers")
+    parser.add_argument("--stress", type=int, metavar="BLOCKS",
+                        help="build one endless tower of BLOCKS blocks with a steady player")
+    args = parser.parse_args(argv)
+
+    if args.stress:
+        stress(args.stress, args.seed)
+        return
+
+    if args.drops:
+        drops = [int(tick) for tick in args.drops.split(",")]
+        print(run_game(drops=drops, seed=args.seed, max_ticks=args.max_ticks, endless=args.endless))
+        return
+
+    rng = random.Random(args.seed)
+    results = []
+    start = time.perf_counter()
+    for i in range(args.games):
+        policy = random_delay_policy(rng)
+        results.append(run_game(policy=policy, seed=args.seed + i, max_ticks=args.max_ticks,
+                                endless=args.endless))
+    elapsed = time.perf_counter() - start
+
+    scores = sorted(r.score for r in results)
+    ticks = sum(r.ticks for r in results)
+    print(f"{args.games} games in {elapsed:.2f}s ({args.games / elapsed:.0f} games/s, "
+          f"{ticks / elapsed:.0f} ticks/s)")
+    print(f"score mean {sum(scores) / len(scores):.2f}  median {scores[len(scores) // 2]}  "
+          f"max {scores[-1]}")
+
+
+if __name__ == "__main__":
+    main()
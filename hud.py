@@ -0,0 +1,62 @@
+from collections import OrderedDict
+
+# -------------------------------
+# Cached text rendering + HUD
+# -------------------------------
+
+class TextCache:
+    """Rendered text surfaces keyed by (font, text, color, background).
+
+    Least recently used entries are evicted past `limit`, so a changing
+    score can't grow the cache without bound.
+    """
+    def __init__(self, limit=64):
+        self.limit = limit
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, background=None):
+        key = (font, text, color, background)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color, background)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.limit:
+            self.surfaces.popitem(last=False)
+        return surface
+
+class Hud:
+    """Named text items drawn with one blits() call.
+
+    text() only touches the cache when an item's content or style changed,
+    and the blit list is rebuilt only then, so a steady frame renders no
+    text at all.
+    """
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else TextCache()
+        self.items = {}  # name -> ((font, text, color, pos), surface)
+        self.blit_list = []
+        self.dirty = False
+
+    def text(self, name, text, font, color, pos):
+        key = (font, text, color, pos)
+        item = self.items.get(name)
+        if item is not None and item[0] == key:
+            return
+        self.items[name] = (key, self.cache.render(font, text, color))
+        self.dirty = True
+
+    def remove(self, name):
+        if self.items.pop(name, None) is not None:
+            self.dirty = True
+
+    def draw(self, surface):
+        if self.dirty:
+            self.blit_list = [(item_surface, key[3]) for key, item_surface in self.items.values()]
+            self.dirty = False
+        surface.blits(self.blit_list, doreturn=False)
@@ -0,0 +1,114 @@
+import json
+import time
+
+# -------------------------------
+# Blink-to-drop latency tracking
+# -------------------------------
+# Every blink carries monotonic timestamps from the camera side (capture,
+# detection done); the game adds delivery, drop and present times. Each
+# stage goes into a fixed-bucket histogram so memory stays constant.
+
+class Histogram:
+    """Latency histogram with 1 ms buckets up to `limit_ms` (plus overflow)"""
+    def __init__(self, limit_ms=1000):
+        self.limit_ms = limit_ms
+        self.buckets = [0] * (limit_ms + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        ms = max(0.0, seconds * 1000)
+        self.buckets[min(int(ms), self.limit_ms)] += 1
+        self.count += 1
+        self.total += ms
+
+    def percentile(self, p):
+        """Upper edge (ms) of the bucket holding the p-th percentile"""
+        if not self.count:
+            return None
+        target = self.count * p / 100
+        seen = 0
+        for ms, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return ms + 1
+        return self.limit_ms
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+class LatencyTracker:
+    # detect:  frame captured -> detect_blink() returned
+    # deliver: detection -> main loop drained the event
+    # drop:    drained -> brock.drop() called
+    # present: drop -> pygame.display.update() returned
+    # total:   frame captured -> drop visible on screen
+    # sound:   effect triggered -> audible (estimate, see audio.AudioEngine)
+    STAGES = ("detect", "deliver", "drop", "present", "total", "sound")
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self):
+        self.histograms = {stage: Histogram() for stage in self.STAGES}
+        self.pending = None  # (event, delivered, dropped) waiting for present
+        self.visible = False
+
+    def record(self, stage, seconds):
+        self.histograms[stage].add(seconds)
+
+    def delivered(self, events, now=None):
+        if now is None:
+            now = time.monotonic()
+        for event in events:
+            self.record("detect", event.detected - event.timestamp)
+            self.record("deliver", now - event.detected)
+        return now
+
+    def dropped(self, event, delivered, now=None):
+        if now is None:
+            now = time.monotonic()
+        self.pending = (event, delivered, now)
+
+    def presented(self, now=None):
+        if self.pending is None:
+            return
+        if now is None:
+            now = time.monotonic()
+        event, delivered, dropped = self.pending
+        self.pending = None
+        self.record("drop", dropped - delivered)
+        self.record("present", now - dropped)
+        self.record("total", now - event.timestamp)
+
+    def summary(self):
+        """{stage: {"count", "mean", "p50", "p95", "p99"}} in milliseconds"""
+        result = {}
+        for stage, hist in self.histograms.items():
+            row = {"count": hist.count, "mean": hist.mean()}
+            for p in self.PERCENTILES:
+                row[f"p{p}"] = hist.percentile(p)
+            result[stage] = row
+        return result
+
+    def lines(self):
+        lines = ["latency (ms)   p50   p95   p99     n"]
+        for stage, row in self.summary().items():
+            cells = "".join(f"{row[f'p{p}'] if row[f'p{p}'] is not None else '-':>6}"
+                            for p in self.PERCENTILES)
+            lines.append(f"{stage:<12}{cells}{row['count']:>6}")
+        return lines
+
+    def draw(self, surface, font, pos=(10, 60)):
+        """Render the percentile table, toggled with the L key"""
+        x, y = pos
+        for line in self.lines():
+            text = font.render(line, True, (255, 255, 255), (0, 0, 0))
+            surface.blit(text, (x, y))
+            y += text.get_height()
+
+    def dump(self, path):
+        data = {
+            "summary": self.summary(),
+            "histograms_ms": {stage: hist.buckets for stage, hist in self.histograms.items()},
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
@@ -0,0 +1,111 @@
+import time
+from collections import deque
+
+import pygame
+
+# -------------------------------
+# Frame-time profiler overlay (F3)
+# -------------------------------
+
+class FrameProfiler:
+    """Per-stage timings of the main loop plus a rolling frame-time graph.
+
+    Call begin() at the top of a frame and mark(stage) after each stage;
+    the time since the previous mark is charged to that stage. Frames are
+    judged against the render rate `fps` (config.RENDER_FPS).
+    """
+    STAGES = ("idle", "camera", "blinks", "hud", "events", "logic", "draw", "present")
+
+    def __init__(self, history=120, fps=60):
+        self.history = history
+        self.target = 1 / (fps or 60)  # RENDER_FPS 0 = uncapped, judge against 60
+        self.frames = deque(maxlen=history)  # total seconds per frame
+        self.stages = {stage: deque(maxlen=history) for stage in self.STAGES}
+        self.current = dict.fromkeys(self.STAGES, 0.0)
+        self.visible = False
+        self.frame_start = None
+        self.last_mark = None
+
+        # Camera side rates, sampled from the camera's counters
+        self.rate_time = time.perf_counter()
+        self.rate_counts = (0, 0)
+        self.capture_rate = 0.0
+        self.detect_rate = 0.0
+        self.detect_target = None  # (rate, scale) from the detection scheduler
+        self.capture_age = None  # seconds, how stale frames are when read
+        self.age_clock = None  # sources.CLOCKS entry capture_age is measured from
+
+        # Text is re-rendered twice a second, not every frame
+        self.text = []
+        self.text_time = 0.0
+
+    def begin(self):
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.frames.append(now - self.frame_start)
+            for stage, seconds in self.current.items():
+                self.stages[stage].append(seconds)
+                self.current[stage] = 0.0
+        self.frame_start = self.last_mark = now
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.current[stage] += now - self.last_mark
+        self.last_mark = now
+
+    def sample_camera(self, counters, schedule=None, capture_age=None, age_clock=None):
+        """Update capture/detection rates from (captures, detections) totals"""
+        self.detect_target = schedule
+        self.capture_age = capture_age
+        self.age_clock = age_clock
+        now = time.perf_counter()
+        elapsed = now - self.rate_time
+        if elapsed < 1.0:
+            return
+        captures, detections = counters
+        self.capture_rate = (captures - self.rate_counts[0]) / elapsed
+        self.detect_rate = (detections - self.rate_counts[1]) / elapsed
+        self.rate_counts = (captures, detections)
+        self.rate_time = now
+
+    def averages(self):
+        """Mean milliseconds per stage over the history"""
+        return {stage: 1000 * sum(values) / len(values) if values else 0.0
+                for stage, values in self.stages.items()}
+
+    def draw(self, surface, font, pos=(540, 10)):
+        x, y = pos
+        width, height = 250, 60
+        panel = pygame.Rect(x, y, width, height)
+        pygame.draw.rect(surface, (0, 0, 0), panel)
+
+        # Frame-time graph, one column per frame, scaled so 2x target fills it
+        scale = height / (2 * self.target)
+        bar = width / self.history
+        for i, seconds in enumerate(self.frames):
+            h = min(height, seconds * scale)
+            color = (0, 200, 0) if seconds <= self.target * 1.05 else (220, 40, 40)
+            pygame.draw.rect(surface, color, (x + i * bar, y + height - h, max(1, bar), h))
+        target_y = y + height - self.target * scale
+        pygame.draw.line(surface, (255, 255, 0), (x, target_y), (x + width, target_y))
+
+        now = time.perf_counter()
+        if now - self.text_time > 0.5:
+            self.text_time = now
+            frame_ms = 1000 * sum(self.frames) / len(self.frames) if self.frames else 0.0
+            lines = [f"frame {frame_ms:5.1f} ms ({1000 / frame_ms if frame_ms else 0:4.0f} fps)"]
+            lines += [f"{stage:<8}{ms:6.2f} ms" for stage, ms in self.averages().items()]
+            lines.append(f"camera {self.capture_rate:4.0f}/s  detect {self.detect_rate:4.0f}/s")
+            if self.detect_target:
+                rate, scale = self.detect_target
+                lines.append(f"detect target {rate:4.0f}/s at {scale:.0%} size")
+            if self.capture_age is not None:
+                # without driver timestamps the age starts at grab(), so it
+                # can't see frames waiting in the driver queue
+                fallback = " (from grab)" if self.age_clock == "grab" else ""
+                lines.append(f"capture age {1000 * self.capture_age:5.1f} ms{fallback}")
+            self.text = [font.render(line, True, (255, 255, 255), (0, 0, 0)) for line in lines]
+        y += height + 2
+        for text in self.text:
+            surface.blit(text, (x, y))
+            y += text.get_height()
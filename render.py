@@ -0,0 +1,139 @@
+import weakref
+
+import pygame
+
+try:
+    from pygame._sdl2.video import Window, Renderer, Texture, error as SDLError
+except ImportError:  # pygame without the SDL2 video bindings
+    Renderer = None
+
+# -------------------------------
+# Presentation backends
+# -------------------------------
+# The game draws through a "view" so the same loop can present either by
+# blitting onto the display surface (classic) or through an SDL2
+# Renderer, where the camera frame streams into a texture, sprites are
+# textures and the renderer scales the 800x600 logical screen to the
+# window, e.g. fullscreen at the monitor's native resolution.
+
+class SurfaceView:
+    """Classic presentation: everything is blitted onto the display surface"""
+    textured = False
+
+    def __init__(self, size=(800, 600), caption="", icon=None):
+        self.size = size
+        self.surface = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+        if icon is not None:
+            pygame.display.set_icon(icon)
+
+    def blit(self, surface, pos, area=None):
+        self.surface.blit(surface, pos, area)
+
+    def blits(self, blit_list, doreturn=False):
+        self.surface.blits(blit_list, doreturn=doreturn)
+
+    def fill(self, color):
+        self.surface.fill(color)
+
+    def camera(self, frame):
+        self.surface.blit(frame, (0, 0))
+
+    def overlay(self):
+        """Surface for debug overlays (L / F3)"""
+        return self.surface
+
+    def present(self):
+        pygame.display.update()
+
+class TextureView:
+    """SDL2 Renderer presentation.
+
+    Static surfaces (images, cached text) are uploaded as textures once and
+    kept while the surface lives. The camera frame goes into a streaming
+    texture. Uses the GPU when there is one and SDL's software renderer
+    otherwise.
+    """
+    textured = True
+
+    def __init__(self, size=(800, 600), caption="", icon=None, fullscreen=False, vsync=False):
+        if Renderer is None:
+            raise RuntimeError("the renderer backend needs pygame built with SDL2 video bindings")
+        self.size = size
+        self.window = Window(caption, size=size, fullscreen_desktop=fullscreen)
+        if icon is not None:
+            self.window.set_icon(icon)
+        try:
+            self.renderer = Renderer(self.window, accelerated=1, vsync=vsync)
+        except (pygame.error, SDLError):
+            self.renderer = Renderer(self.window, accelerated=0)  # software renderer
+        self.renderer.logical_size = size  # letterboxed scaling to the window
+        self.textures = weakref.WeakKeyDictionary()  # surface -> Texture
+        self.circles = {}  # (color, radius) -> Texture
+        self.stream = None  # camera texture
+        self.stream_frame = None  # last frame uploaded to it
+        self.overlay_surface = None
+        self.overlay_used = False
+
+    def texture(self, surface):
+        """Texture for a surface that doesn't change after it was made"""
+        texture = self.textures.get(surface)
+        if texture is None:
+            texture = self.textures[surface] = Texture.from_surface(self.renderer, surface)
+        return texture
+
+    def blit(self, surface, pos, area=None):
+        width, height = area.size if area is not None else surface.get_size()
+        self.texture(surface).draw(srcrect=area, dstrect=(pos[0], pos[1], width, height))
+
+    def blits(self, blit_list, doreturn=False):
+        for surface, pos in blit_list:
+            self.blit(surface, pos)
+
+    def fill(self, color):
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.clear()
+
+    def camera(self, frame):
+        """Draw a camera frame scaled to the screen, uploading it only when new"""
+        if frame is not self.stream_frame:
+            if self.stream is None or self.stream.get_rect().size != frame.get_size():
+                self.stream = Texture(self.renderer, frame.get_size(), streaming=True)
+            self.stream.update(frame)
+            self.stream_frame = frame
+        self.stream.draw(dstrect=(0, 0) + tuple(self.size))
+
+    def line(self, color, start, end):
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.draw_line(start, end)
+
+    def circle(self, color, center, radius):
+        texture = self.circles.get((color, radius))
+        if texture is None:
+            surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(surface, color, (radius, radius), radius)
+            texture = self.circles[(color, radius)] = Texture.from_surface(self.renderer, surface)
+        texture.draw(dstrect=(center[0] - radius, center[1] - radius, radius * 2, radius * 2))
+
+    def overlay(self):
+        """Transparent surface for debug overlays, uploaded on present()"""
+        if self.overlay_surface is None:
+            self.overlay_surface = pygame.Surface(self.size, pygame.SRCALPHA)
+        if not self.overlay_used:
+            self.overlay_surface.fill((0, 0, 0, 0))
+            self.overlay_used = True
+        return self.overlay_surface
+
+    def present(self):
+        if self.overlay_used:
+            Texture.from_surface(self.renderer, self.overlay_surface).draw()
+            self.overlay_used = False
+        self.renderer.present()
+
+def create_view(backend="surface", size=(800, 600), caption="", icon=None, fullscreen=False):
+    """Presentation backend for config.DISPLAY_BACKEND ("surface" or "renderer")"""
+    if backend == "surface":
+        return SurfaceView(size, caption, icon)
+    if backend == "renderer":
+        return TextureView(size, caption, icon, fullscreen)
+    raise ValueError(f"unknown display backend {backend!r}, expected 'surface' or 'renderer'")
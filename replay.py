@@ -0,0 +1,174 @@
+"""Record and replay game sessions.
+
+A recording holds the RNG seed, the tick rate and every input event keyed
+to the simulation tick. Events are stored as a varint tick delta plus one
+type byte, so a long session is a few kilobytes.
+
+    python main.py --record session.tbr     # play and record
+    python main.py --replay session.tbr     # watch it again, no camera
+    python replay.py session.tbr            # headless, as fast as possible
+"""
+import argparse
+import struct
+import time
+from functools import partial
+
+from game import Game, Tower
+
+MAGIC = b"TBRP"
+VERSION = 3  # bumped whenever game rules change, old recordings would diverge
+HEADER = struct.Struct("<4sBQHB")  # magic, version, seed, tick rate, endless mode
+
+# Event types
+DROP = 1      # block released on this tick (what the simulation consumed)
+BLINK = 2     # blink event delivered to the game
+SPACE = 3     # space bar pressed
+CLEAR = 4     # 'B' pressed, pending blinks cleared
+RESTART = 5   # new game started after game over
+END = 6       # session ended
+
+EVENT_NAMES = {DROP: "drop", BLINK: "blink", SPACE: "space", CLEAR: "clear",
+               RESTART: "restart", END: "end"}
+
+
+def write_varint(out, value):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+class Recording:
+    def __init__(self, seed, tick_rate=60, events=None, endless=False):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.endless = endless
+        self.events = events if events is not None else []  # [(tick, type)]
+
+    def to_bytes(self):
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, self.tick_rate, self.endless))
+        last = 0
+        for tick, kind in self.events:
+            write_varint(out, tick - last)
+            out.append(kind)
+            last = tick
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, tick_rate, endless = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a Tower Brocks recording (or unsupported version)")
+        events = []
+        pos = HEADER.size
+        tick = 0
+        while pos < len(data):
+            delta, pos = read_varint(data, pos)
+            tick += delta
+            events.append((tick, data[pos]))
+            pos += 1
+        return cls(seed, tick_rate, events, bool(endless))
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class Recorder:
+    """Collects input events during play; save() on exit"""
+    def __init__(self, seed, tick_rate=60, endless=False):
+        self.recording = Recording(seed, tick_rate, endless=endless)
+
+    def record(self, tick, kind):
+        self.recording.events.append((tick, kind))
+
+    def save(self, path, tick):
+        self.record(tick, END)
+        self.recording.save(path)
+
+
+class Replayer:
+    """Answers "what happened on this tick" for a loaded recording"""
+    def __init__(self, recording):
+        self.recording = recording
+        self.by_tick = {}
+        for tick, kind in recording.events:
+            self.by_tick.setdefault(tick, []).append(kind)
+        self.last_tick = recording.events[-1][0] if recording.events else 0
+
+    def events_at(self, tick):
+        return self.by_tick.get(tick, ())
+
+    def dropped(self, tick):
+        return DROP in self.events_at(tick)
+
+    def restarted(self, tick):
+        return RESTART in self.events_at(tick)
+
+    def finished(self, tick):
+        return tick > self.last_tick or END in self.events_at(tick)
+
+
+def replay_headless(recording):
+    """Play a recording back without rendering, return [(score, size, ticks)]"""
+    replayer = Replayer(recording)
+    game = Game(make_tower=partial(Tower, endless=recording.endless), seed=recording.seed)
+    results = []
+    tick = 0
+    while True:
+        if game.over:
+            results.append((game.score, game.tower.size, game.ticks))
+            if not replayer.restarted(tick):
+                break
+            game.reset()
+        if replayer.finished(tick):
+            results.append((game.score, game.tower.size, game.ticks))
+            break
+        game.step(drop=replayer.dropped(tick))
+        tick += 1
+    return results, tick
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded session headless")
+    parser.add_argument("recording")
+    parser.add_argument("--events", action="store_true", help="list every recorded event")
+    args = parser.parse_args(argv)
+
+    recording = Recording.load(args.recording)
+    mode = "endless" if recording.endless else "classic"
+    print(f"seed {recording.seed}, {recording.tick_rate} Hz, {mode}, {len(recording.events)} events")
+    if args.events:
+        for tick, kind in recording.events:
+            print(f"{tick:>8} {tick / recording.tick_rate:>9.2f}s  {EVENT_NAMES.get(kind, kind)}")
+
+    start = time.perf_counter()
+    results, ticks = replay_headless(recording)
+    elapsed = time.perf_counter() - start
+    for i, (score, size, game_ticks) in enumerate(results, 1):
+        print(f"game {i}: score {score}, {size} blocks, {game_ticks} ticks")
+    print(f"{ticks} ticks replayed in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""Blink detection service: one camera and detector shared by many games.
+
+    python service.py                                  # webcam, default detector
+    python service.py --source video:clip.mp4 --loop   # recorded clip instead
+    python service.py --watch                          # print the blinks a client sees
+
+Games subscribe with TOWERBROCK_CAMERA_MODE=service (address in
+TOWERBROCK_SERVICE). Capture and detection run once per frame however many
+clients are connected; every client gets the timestamped blink events and,
+if it asks for them, downscaled preview frames.
+"""
+import argparse
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+from camera import CameraThread, FramePipeline, FRAME_SIZE, frame_surface
+from channels import BlinkEvent, BlinkChannel, FrameMailbox
+from sources import CLOCKS, create_source
+import config
+
+# -------------------------------
+# Wire format
+# -------------------------------
+# A client opens a TCP connection on localhost and sends HELLO. From then
+# on the service sends messages, each a MESSAGE header (kind, payload
+# length) and the payload. Blink timestamps are time.monotonic(), which
+# is system-wide, so clients on the same machine can compare them with
+# their own clock.
+
+MAGIC = b"TBSV"
+VERSION = 1
+HELLO = struct.Struct("<4sBB")  # magic, version, flags
+MESSAGE = struct.Struct("<BI")  # kind, payload length
+
+PREVIEW = 1  # HELLO flag: send preview frames
+
+BLINK = 1  # BLINK_EVENT payload
+FRAME = 2  # FRAME_HEADER payload followed by BGRA pixels
+STATUS = 3  # STATUS_INFO payload
+
+BLINK_EVENT = struct.Struct("<dd")  # timestamp, detected
+FRAME_HEADER = struct.Struct("<HH")  # width, height
+STATUS_INFO = struct.Struct("<QQdddB")  # captures, detections, rate, scale, age, clock
+
+DEFAULT_PORT = 5577
+
+def parse_address(address):
+    """"host:port" or just "port" -> (host, port)"""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+def message(kind, payload):
+    return MESSAGE.pack(kind, len(payload)) + payload
+
+def recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("service closed the connection")
+        data += chunk
+    return bytes(data)
+
+# -------------------------------
+# Service side
+# -------------------------------
+
+class Subscriber(threading.Thread):
+    """One connected client with its own sender thread.
+
+    Blink events queue up (they are tiny and must not be lost); preview
+    frames and status only keep the newest one, so a slow client skips
+    previews instead of holding up the camera or the other clients.
+    """
+    def __init__(self, sock, preview):
+        super().__init__(daemon=True)
+        self.sock = sock
+        self.preview = preview
+        self.blinks = deque()  # unbounded, a blink a second at most
+        self.frame = None
+        self.status = None
+        self.wake = threading.Condition()
+        self.running = True
+
+    def send_blink(self, payload):
+        with self.wake:
+            self.blinks.append(payload)
+            self.wake.notify()
+
+    def send_frame(self, payload):
+        with self.wake:
+            self.frame = payload
+            self.wake.notify()
+
+    def send_status(self, payload):
+        with self.wake:
+            self.status = payload
+            self.wake.notify()
+
+    def run(self):
+        try:
+            while self.running:
+                with self.wake:
+                    while self.running and not (self.blinks or self.frame or self.status):
+                        self.wake.wait()
+                    out = [message(BLINK, payload) for payload in self.blinks]
+                    self.blinks.clear()
+                    if self.status is not None:
+                        out.append(message(STATUS, self.status))
+                    if self.frame is not None:
+                        out.append(message(FRAME, self.frame))
+                    self.frame = self.status = None
+                if out:
+                    self.sock.sendall(b"".join(out))
+        except OSError:
+            pass  # client went away
+        self.close()
+
+    def close(self):
+        with self.wake:
+            self.running = False
+            self.wake.notify()
+        self.sock.close()
+
+class BlinkService:
+    """Runs a CameraThread and fans its output out to subscribers.
+
+    The service stands in for the thread's blink channel (push()) and
+    display output (publish()), so events go out from the camera thread
+    the moment they are detected instead of waiting for a poll, and the
+    800x600 display conversion is never done.
+    """
+    def __init__(self, camera, address=("127.0.0.1", DEFAULT_PORT), preview_size=(320, 240),
+                 status_interval=0.5):
+        self.camera = camera
+        self.camera.blinks = self
+        self.camera.publish = self.publish
+        self.preview_size = preview_size
+        self.pipeline = FramePipeline(preview_size, buffers=0)
+        self.preview = np.empty((preview_size[1], preview_size[0], 4), np.uint8)
+        self.status_interval = status_interval
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.server = socket.create_server(address)
+        self.server.settimeout(status_interval)
+        self.address = self.server.getsockname()
+        self.blink_count = 0
+
+    def clients(self):
+        with self.lock:
+            self.subscribers = [s for s in self.subscribers if s.running]
+            return list(self.subscribers)
+
+    # CameraThread's BlinkChannel interface
+    def push(self, event):
+        self.blink_count += 1
+        payload = BLINK_EVENT.pack(event.timestamp, event.detected)
+        for subscriber in self.clients():
+            subscriber.send_blink(payload)
+
+    # Replaces CameraThread.publish(); the raw captured frame is scaled
+    # straight to preview size, once for all clients that want
+    # it and not at all when none do
+    def publish(self, frame):
+        viewers = [s for s in self.clients() if s.preview]
+        if not viewers:
+            return
+        self.pipeline.process(frame, out=self.preview)
+        payload = FRAME_HEADER.pack(*self.preview_size) + self.preview.tobytes()
+        for subscriber in viewers:
+            subscriber.send_frame(payload)
+
+    def status(self):
+        captures, detections = self.camera.counters()
+        rate, scale = self.camera.schedule()
+        return STATUS_INFO.pack(captures, detections, rate, scale, self.camera.age(),
+                                CLOCKS.index(self.camera.age_clock()))
+
+    def serve(self, duration=None):
+        """Accept clients until interrupted (or for `duration` seconds)"""
+        self.camera.start()
+        end = time.monotonic() + duration if duration else None
+        try:
+            while self.camera.is_alive() and (end is None or time.monotonic() < end):
+                try:
+                    sock, peer = self.server.accept()
+                except TimeoutError:
+                    sock = None
+                if sock is not None:
+                    self.subscribe(sock, peer)
+                status = self.status()
+                for subscriber in self.clients():
+                    subscriber.send_status(status)
+        finally:
+            self.close()
+
+    def subscribe(self, sock, peer):
+        sock.settimeout(2.0)
+        try:
+            magic, version, flags = HELLO.unpack(recv_exactly(sock, HELLO.size))
+        except (OSError, struct.error):
+            sock.close()
+            return
+        if magic != MAGIC or version != VERSION:
+            print(f"rejected {peer}: not a version {VERSION} client")
+            sock.close()
+            return
+        sock.settimeout(None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        subscriber = Subscriber(sock, bool(flags & PREVIEW))
+        subscriber.start()
+        with self.lock:
+            self.subscribers.append(subscriber)
+        print(f"client {peer[0]}:{peer[1]} connected ({len(self.subscribers)} total)")
+
+    def close(self):
+        self.camera.stop()
+        self.camera.join(timeout=2)
+        for subscriber in self.clients():
+            subscriber.close()
+        self.server.close()
+
+# -------------------------------
+# Client side
+# -------------------------------
+
+class ServiceCamera(threading.Thread):
+    """Subscribes to a BlinkService, same interface as CameraThread.
+
+    Blink events land in a BlinkChannel and preview frames in a
+    FrameMailbox, so the game loop can't tell it from a local camera.
+    """
+    def __init__(self, address=f"127.0.0.1:{DEFAULT_PORT}", preview=True):
+        super().__init__(daemon=True)
+        self.blinks = BlinkChannel()
+        self.frames = FrameMailbox()
+        self.last_seq = -1
+        self.info = (0, 0, 0.0, 1.0, 0.0, CLOCKS.index("grab"))  # last STATUS_INFO
+        self.sock = socket.create_connection(parse_address(address), timeout=2.0)
+        self.sock.sendall(HELLO.pack(MAGIC, VERSION, PREVIEW if preview else 0))
+        self.sock.settimeout(None)
+        self.running = True
+
+    def run(self):
+        try:
+            while self.running:
+                kind, size = MESSAGE.unpack(recv_exactly(self.sock, MESSAGE.size))
+                payload = recv_exactly(self.sock, size)
+                if kind == BLINK:
+                    self.blinks.push(BlinkEvent(*BLINK_EVENT.unpack(payload)))
+                elif kind == FRAME:
+                    self.frames.put((FRAME_HEADER.unpack_from(payload), payload))
+                elif kind == STATUS:
+                    self.info = STATUS_INFO.unpack(payload)
+        except OSError:
+            pass  # service stopped, or stop() closed the socket
+        self.running = False
+
+    def latest_frame(self):
+        """Return the newest preview frame, or None if it was already taken"""
+        seq, frame = self.frames.get()
+        if seq == self.last_seq:
+            return None
+        self.last_seq = seq
+        return frame
+
+    def to_surface(self, frame):
+        size, payload = frame
+        surface = frame_surface(memoryview(payload)[FRAME_HEADER.size:], size)
+        return pygame.transform.scale(surface, FRAME_SIZE)
+
+    def counters(self):
+        """(frames captured, frames detected) by the service"""
+        return self.info[0], self.info[1]
+
+    def schedule(self):
+        return self.info[2], self.info[3]
+
+    def age(self):
+        return self.info[4]
+
+    def age_clock(self):
+        return CLOCKS[self.info[5]]
+
+    def stop(self):
+        self.running = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+def watch(address):
+    """Print blinks as a subscribed client receives them"""
+    client = ServiceCamera(address, preview=False)
+    client.start()
+    print(f"watching {address}")
+    try:
+        while client.is_alive():
+            for event in client.blinks.drain():
+                delay = (time.monotonic() - event.timestamp) * 1000
+                print(f"blink captured {event.timestamp:.3f}, received {delay:.1f} ms later")
+            time.sleep(0.01)
+    except KeyboardInterrupt:
+        pass
+    client.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--address", default=config.SERVICE_ADDRESS,
+                        help="host:port to listen on / connect to (default: %(default)s)")
+    parser.add_argument("--source", default=config.FRAME_SOURCE, help="frame source spec")
+    parser.add_argument("--pacing", default=config.SOURCE_PACING)
+    parser.add_argument("--loop", action="store_true", help="loop video/image sources")
+    parser.add_argument("--detector", default=config.DETECTOR_BACKEND)
+    parser.add_argument("--preview", default="320x240", help="preview frame size (WxH)")
+    parser.add_argument("--seconds", type=float, help="stop after this long")
+    parser.add_argument("--watch", action="store_true", help="subscribe and print blinks")
+    args = parser.parse_args(argv)
+
+    if args.watch:
+        watch(args.address)
+        return
+
+    source = create_source(args.source, args.pacing, args.loop, low_latency=config.LOW_LATENCY_CAPTURE)
+    camera = CameraThread(args.detector, source, args.pacing, config.DETECT_RATE,
+                          config.DETECT_BUDGET)
+    width, height = (int(v) for v in args.preview.split("x"))
+    service = BlinkService(camera, parse_address(args.address), (width, height))
+    print(f"blink service on {service.address[0]}:{service.address[1]} ({args.source})")
+    try:
+        service.serve(args.seconds)
+    except KeyboardInterrupt:
+        pass
+    print(f"{service.blink_count} blinks, captured/detected {camera.counters()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+# -------------------------------
+# Frame sources
+# -------------------------------
+# Everything that feeds frames to CameraThread / the benchmarks. Sources
+# follow the small part of the cv2.VideoCapture API we use: read(),
+# isOpened() and release(), returning BGR frames.
+#
+#   camera:0             live webcam
+#   video:clip.mp4       video file
+#   images:frames/*.png  image sequence (a directory or a glob)
+#   synthetic            generated test frames
+#
+# Pacing for file and synthetic sources: "realtime" (the clip's own fps),
+# "fast" (as fast as possible) or a number of frames per second.
+#
+# Every source also has grab() (take the next frame, no decode) and
+# retrieve() (decode the grabbed frame), and sets `captured` to the
+# time.monotonic() the frame was captured, so LatestFrameReader can skip
+# stale frames and report their age. `clock` says where that time came
+# from, one of CLOCKS:
+#
+#   driver   the camera driver's buffer timestamp (V4L2)
+#   paced    when a paced file/synthetic frame fell due
+#   grab     fallback: when grab() returned, blind to driver queueing
+
+CLOCKS = ("driver", "paced", "grab")
+
+class Pacer:
+    """Sleeps so successive frames come out at `rate` frames per second.
+
+    Like a camera driver queue, frames that fell due while nobody was
+    reading are kept, up to `backlog` of them; older ones are skipped.
+    wait() returns the time.monotonic() the frame fell due.
+    """
+    def __init__(self, rate=None, backlog=0):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.backlog = backlog
+        self.next_time = None
+
+    def wait(self):
+        now = time.monotonic()
+        if not self.interval:
+            return now
+        if self.next_time is None:
+            self.next_time = now
+        elif self.next_time > now:
+            time.sleep(self.next_time - now)
+        else:
+            # frames due after this one; the queue only holds the newest few
+            behind = int((now - self.next_time) / self.interval)
+            self.next_time += max(0, behind - max(0, self.backlog - 1)) * self.interval
+        due = self.next_time
+        self.next_time += self.interval
+        return due
+
+def pacing_rate(pacing, native_fps):
+    if pacing in (None, "fast"):
+        return None
+    if pacing == "realtime":
+        return native_fps or 30
+    return float(pacing)
+
+class CameraSource:
+    """Live webcam through cv2.VideoCapture.
+
+    low_latency asks the driver for a one-frame queue and MJPG (less USB
+    bandwidth and faster delivery than raw YUYV on most webcams). Backends
+    ignore properties they don't support; `supported` records what stuck.
+    """
+    def __init__(self, index=0, width=640, height=480, fps=30, low_latency=False):
+        self.capture = cv2.VideoCapture(index)
+        self.fps = fps
+        self.captured = None
+        self.clock = "grab"
+        # V4L2 reports each buffer's CLOCK_MONOTONIC timestamp as POS_MSEC,
+        # the same clock as time.monotonic(); other backends report a
+        # stream position or nothing
+        self.driver_timestamps = self.capture.isOpened() and self.capture.getBackendName() == "V4L2"
+        self.supported = {}
+        if low_latency:
+            # FOURCC has to be set before the frame size on V4L2
+            self.supported["mjpg"] = self.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        # Set camera properties for better performance
+        self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.capture.set(cv2.CAP_PROP_FPS, fps)
+        if low_latency:
+            self.supported["buffersize"] = self.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            for name, ok in self.supported.items():
+                if not ok:
+                    print(f"[camera] {name} not supported by this camera/backend, continuing without it")
+
+    def set(self, prop, value):
+        """Set a capture property, return True only if the backend kept it"""
+        try:
+            return bool(self.capture.set(prop, value)) and self.capture.get(prop) == value
+        except cv2.error:
+            return False
+
+    def grab(self):
+        ok = self.capture.grab()
+        now = time.monotonic()
+        self.captured, self.clock = now, "grab"  # grab returns once the frame has arrived
+        if ok and self.driver_timestamps:
+            stamp = self.capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            if 0 <= now - stamp < 1.0:  # ignore anything not on our clock
+                self.captured, self.clock = stamp, "driver"
+        return ok
+
+    def retrieve(self):
+        return self.capture.retrieve()
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def release(self):
+        self.capture.release()
+
+class VideoFileSource:
+    """Play a video file, optionally looping"""
+    clock = "paced"
+
+    def __init__(self, path, pacing="realtime", loop=False, backlog=0):
+        self.path = path
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise RuntimeError(f"could not open video {path}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30
+        self.pacer = Pacer(pacing_rate(pacing, self.fps), backlog)
+        self.loop = loop
+        self.finished = False
+        self.captured = None
+
+    def grab(self):
+        self.captured = self.pacer.wait()
+        ok = self.capture.grab()
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok = self.capture.grab()
+        if not ok:
+            self.finished = True
+        return ok
+
+    def retrieve(self):
+        return self.capture.retrieve()
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def isOpened(self):
+        return not self.finished and self.capture.isOpened()
+
+    def release(self):
+        self.capture.release()
+
+class ImageSequenceSource:
+    """Play a directory or glob of images in name order"""
+    EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+    clock = "paced"
+
+    def __init__(self, pattern, pacing="realtime", loop=False, fps=30, backlog=0):
+        if os.path.isdir(pattern):
+            paths = [os.path.join(pattern, name) for name in os.listdir(pattern)
+                     if name.lower().endswith(self.EXTENSIONS)]
+        else:
+            paths = glob.glob(pattern)
+        self.paths = sorted(paths)
+        if not self.paths:
+            raise RuntimeError(f"no images found for {pattern}")
+        self.fps = fps
+        self.pacer = Pacer(pacing_rate(pacing, fps), backlog)
+        self.loop = loop
+        self.index = 0
+        self.captured = None
+
+    def grab(self):
+        if self.index >= len(self.paths):
+            if not self.loop:
+                return False
+            self.index = 0
+        self.captured = self.pacer.wait()
+        self.index += 1
+        return True
+
+    def retrieve(self):
+        frame = cv2.imread(self.paths[self.index - 1])
+        return frame is not None, frame
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def isOpened(self):
+        return self.loop or self.index < len(self.paths)
+
+    def release(self):
+        self.index = len(self.paths)
+        self.loop = False
+
+class SyntheticSource:
+    """Generated frames: a gradient with a moving bright square and the
+    frame number, so throughput and latency can be measured anywhere"""
+    clock = "paced"
+
+    def __init__(self, width=640, height=480, pacing="realtime", fps=30, frames=None, backlog=0):
+        self.size = (width, height)
+        self.fps = fps
+        self.pacer = Pacer(pacing_rate(pacing, fps), backlog)
+        self.frames = frames  # None = endless
+        self.count = 0
+        self.captured = None
+        gradient = np.linspace(40, 200, width, dtype=np.uint8)
+        self.background = np.repeat(np.tile(gradient, (height, 1))[:, :, None], 3, axis=2)
+        self.frame = np.empty_like(self.background)
+
+    def grab(self):
+        if self.frames is not None and self.count >= self.frames:
+            return False
+        self.captured = self.pacer.wait()
+        self.count += 1
+        return True
+
+    def retrieve(self):
+        number = self.count - 1
+        width, height = self.size
+        np.copyto(self.frame, self.background)
+        x = (number * 8) % (width - 80)
+        cv2.rectangle(self.frame, (x, height // 2 - 40), (x + 80, height // 2 + 40), (255, 255, 255), -1)
+        cv2.putText(self.frame, str(number), (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+        return True, self.frame
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def isOpened(self):
+        return self.frames is None or self.count < self.frames
+
+    def release(self):
+        self.frames = self.count
+
+class LatestFrameReader:
+    """Low-latency reads from a source that queues frames.
+
+    grab() is cheap, there is no decode: frames already queued come back at
+    once, so keep grabbing until one has to be waited for (or MAX_DRAIN
+    is hit) and retrieve() only that one. `age` is how old the returned
+    frame was when read() returned, `skipped` counts stale frames dropped.
+    """
+    MAX_DRAIN = 8
+
+    def __init__(self, source):
+        self.source = source
+        self.threshold = 0.25 / (getattr(source, "fps", None) or 30)
+        self.captured = None
+        self.clock = "grab"
+        self.age = 0.0
+        self.skipped = 0
+
+    def read(self):
+        for drained in range(self.MAX_DRAIN):
+            start = time.monotonic()
+            if not self.source.grab():
+                return False, None
+            if time.monotonic() - start >= self.threshold:
+                break  # had to wait for it, so it's fresh
+        self.skipped += drained
+        ret, frame = self.source.retrieve()
+        self.captured = self.source.captured
+        self.clock = self.source.clock
+        self.age = time.monotonic() - self.captured
+        return ret, frame
+
+    def isOpened(self):
+        return self.source.isOpened()
+
+    def release(self):
+        self.source.release()
+
+def create_source(spec="camera:0", pacing="realtime", loop=False, low_latency=False, backlog=4):
+    """Build a frame source from a spec string (see the list above).
+
+    A bare path is treated as a video file, or as an image sequence when it
+    is a directory or contains a wildcard; a bare number is a camera index.
+
+    low_latency wraps the source in a LatestFrameReader. Paced file and
+    synthetic sources queue up to `backlog` frames like a camera driver
+    does, so the low-latency path can be tried without a webcam.
+    """
+    kind, _, arg = spec.partition(":")
+    if kind not in ("camera", "video", "images", "synthetic"):
+        kind, arg = "", spec
+        if spec.isdigit():
+            kind = "camera"
+        elif os.path.isdir(spec) or any(c in spec for c in "*?["):
+            kind = "images"
+        else:
+            kind = "video"
+
+    if kind != "camera" and pacing_rate(pacing, 30) is None:
+        low_latency = False  # unpaced, every grab returns at once and nothing goes stale
+    if kind == "camera":
+        source = CameraSource(int(arg or 0), low_latency=low_latency)
+    elif kind == "video":
+        source = VideoFileSource(arg, pacing, loop, backlog=backlog)
+    elif kind == "images":
+        source = ImageSequenceSource(arg, pacing, loop, backlog=backlog)
+    else:
+        source = SyntheticSource(pacing=pacing, frames=int(arg) if arg else None, backlog=backlog)
+    return LatestFrameReader(source) if low_latency else source
@@ -0,0 +1,143 @@
+import pygame
+
+from game import origin, Block as BlockState, Tower as TowerState
+
+# -------------------------------
+# Drawable block and tower
+# -------------------------------
+# Game rules live in game.py; these add the images and drawing on top.
+
+class Block(BlockState, pygame.sprite.Sprite):
+    def __init__(self, assets):
+        BlockState.__init__(self)
+        pygame.sprite.Sprite.__init__(self)
+        self.assets = assets
+        self.image_name = "block"
+        self.image = assets.image(self.image_name)
+        self.rect = self.image.get_rect()
+
+    def display(self, screen, tower, alpha=1.0):
+        if not tower.is_scrolling():
+            x, y = self.render_pos(alpha)
+            pygame.draw.circle(screen, (200, 0, 0), origin, 5, 0)
+            if self.rotation is None:
+                screen.blit(self.image, (x, y))
+            else:
+                # cached rotated sprite, turned about its center
+                rotimg, (dx, dy) = self.assets.rotated(self.image_name, self.rotation)
+                screen.blit(rotimg, (x + dx, y + dy))
+            if self.state == "ready":
+                self.draw_rope(screen, x, y)
+
+    def render(self, view, tower, alpha=1.0):
+        """Draw through a render.TextureView, the renderer rotates the texture"""
+        if not tower.is_scrolling():
+            x, y = self.render_pos(alpha)
+            view.circle((200, 0, 0), origin, 5)
+            width, height = self.image.get_size()
+            # transform.rotate turns counterclockwise, the renderer clockwise
+            angle = -self.rotation if self.rotation is not None else 0
+            view.texture(self.image).draw(dstrect=(x, y, width, height), angle=angle)
+            if self.state == "ready":
+                for dx in (-2, -1, 0, 1, 2):
+                    view.line((0, 0, 0), (origin[0] + dx, origin[1]), (x + 32 + dx, y))
+                view.circle((200, 0, 0), (int(x+32), int(y+2.5)), 5)
+
+    def draw_rope(self, screen, x, y):
+        pygame.draw.aaline(screen, (0, 0, 0), origin, (x+32,y))
+        pygame.draw.aaline(screen, (0, 0, 0), (401,3), (x + 33, y))
+        pygame.draw.aaline(screen, (0, 0, 0), (402,3), (x + 34, y))
+        pygame.draw.aaline(screen, (0, 0, 0), (399,3), (x + 31, y))
+        pygame.draw.aaline(screen, (0, 0, 0), (398,3), (x + 30, y))
+        pygame.draw.circle(screen, (200, 0, 0), (int(x+32),int(y+2.5)), 5, 0)
+
+class Tower(TowerState, pygame.sprite.Sprite):
+    def __init__(self, assets, endless=False):
+        TowerState.__init__(self, endless=endless)
+        pygame.sprite.Sprite.__init__(self)
+        self.image = assets.image("block")
+        self.image2 = assets.image("blockgold")
+        self.imageMAIN = self.image
+        self.rect = self.image.get_rect()
+
+        # Cached tower surface, only touched when the tower changes.
+        # Blocks are stacked bottom-up so new ones can be blitted in place.
+        # Only the window() of visible blocks is ever drawn, so the cost
+        # doesn't depend on the tower's height.
+        self.surface = None
+        self.surface_rows = 0
+        self.cached_start = 0
+        self.cached_blocks = 0
+        self.cached_image = None
+
+    def update_cache(self):
+        """Blit newly landed blocks onto the cached surface.
+
+        The surface is only rebuilt when the visible window shifts, the block
+        image changes (golden) or it runs out of rows.
+        """
+        start, end = self.window()
+        count = end - start
+        if self.surface is None or count > self.surface_rows:
+            self.surface_rows = max(8, self.surface_rows * 2, count)
+            self.surface = pygame.Surface((800, self.surface_rows * 64), pygame.SRCALPHA)
+            self.cached_image = None
+        if (self.image is not self.cached_image or start != self.cached_start
+                or count < self.cached_blocks):
+            self.surface.fill((0, 0, 0, 0))
+            self.cached_start = start
+            self.cached_blocks = 0
+            self.cached_image = self.image
+        for i in range(self.cached_blocks, count):
+            self.surface.blit(self.image, (self.xlist[start + i], (self.surface_rows - i - 1) * 64))
+        self.cached_blocks = count
+
+    def area(self, rows):
+        """Area of the cached surface holding the bottom `rows` blocks"""
+        return pygame.Rect(0, (self.surface_rows - rows) * 64, 800, rows * 64)
+
+    def draw(self):
+        self.image = self.image2 if self.golden else self.imageMAIN
+
+        if self.size < 1:
+            self.rect = pygame.Rect(0, 0, 0, 0)
+            return self.rect
+
+        self.update_cache()
+        area = self.area(self.cached_blocks)
+        self.rect = pygame.Rect(0, 0, area.width, area.height)
+        return area
+
+    def display_unbuilt(self, screen):
+        """Draw the tower without its top block after a collapse"""
+        self.update_cache()
+        area = self.area(self.cached_blocks - 1)
+        self.rect = pygame.Rect(0, 0, area.width, area.height)
+        screen.blit(self.surface, (self.x+self.change, self.y+64), area)
+
+    def render(self, view, alpha=1.0, unbuilt=False):
+        """Draw through a render.TextureView: one texture draw per visible
+        block, no cached surface. unbuilt leaves out the top block."""
+        self.image = self.image2 if self.golden else self.imageMAIN
+        start, end = self.window()
+        if unbuilt:
+            end -= 1
+            x, y = self.x + self.change, self.y + 64
+        else:
+            change = self.prev_change + (self.change - self.prev_change) * alpha
+            x = self.x + change + self.shake_x
+            y = self.prev_y + (self.y - self.prev_y) * alpha + self.shake_y
+        texture = view.texture(self.image)
+        for i in range(start, end):
+            texture.draw(dstrect=(x + self.xlist[i], y + (end - 1 - i) * 64, 64, 64))
+
+    def display(self, screen, alpha=1.0):
+        area = self.draw()
+        if not area.height:
+            return
+        # Apply both wobble and shake effects
+        change = self.prev_change + (self.change - self.prev_change) * alpha
+        y = self.prev_y + (self.y - self.prev_y) * alpha
+        final_x = self.x + change + self.shake_x
+        final_y = y + self.shake_y
+        screen.blit(self.surface, (final_x, final_y), area)
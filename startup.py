@@ -0,0 +1,50 @@
+import threading
+import time
+
+# -------------------------------
+# Background camera start-up
+# -------------------------------
+# Importing camera.py pulls in cv2, numpy, scipy and (for the dlib backend)
+# dlib, and building the camera opens the device and loads the landmark
+# model. All of that happens here, off the main thread, so the start
+# screen is up straight away. Keep this module free of heavy imports.
+
+class CameraLoader(threading.Thread):
+    """Imports the camera stack and starts the camera in the background.
+
+    Takes the create_camera() arguments. Poll ready() from the main loop;
+    camera is set once it is running, error if it failed to start.
+    """
+    def __init__(self, *args):
+        super().__init__(daemon=True)
+        self.args = args
+        self.camera = None
+        self.error = None
+        self.started = time.perf_counter()
+        self.elapsed = None  # seconds until the camera was running
+
+    def run(self):
+        try:
+            from camera import create_camera  # the slow imports
+            camera = create_camera(*self.args)
+            camera.start()
+            self.camera = camera
+        except Exception as e:
+            self.error = e
+        self.elapsed = time.perf_counter() - self.started
+
+    def ready(self):
+        return self.camera is not None
+
+    def status(self):
+        """Short text for the screens while the camera isn't ready"""
+        if self.camera is not None:
+            return "CAMERA READY"
+        if self.error is not None:
+            return "CAMERA UNAVAILABLE"
+        return "INITIALIZING CAMERA..."
+
+    def wait(self, timeout=None):
+        """Join the loader and return the camera (None if it never started)"""
+        self.join(timeout)
+        return self.camera